@@ -1,15 +1,40 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, AsyncIterator
 from datetime import datetime
 import asyncio
+import contextvars
+import base64
 import requests
-from lxml import html
+import httpx
+from lxml import etree, html
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 import re
 import time
 import json
+import math
+import os
+import hashlib
+import threading
+import uuid
+import multiprocessing
+import queue
+import sqlite3
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from contextlib import aclosing, closing, contextmanager
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, TimeoutError as FutureTimeoutError
 from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 import logging
+from text_kernel import (
+    SIZE_UNIT_HINTS, format_price, has_size, iter_inline_json, parse_delta, parse_price,
+    parse_size, parse_variation_price, price_value, text_sizes,
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -17,169 +42,1917 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="MakingCosmetics Scraper API")
 
-# Global scrape status
-scraping_status: Dict[str, Any] = {
-    'is_running': False,
-    'last_run': None,
-    'last_result': None,
-    'last_full_result': None,
-    'error': None,
+# Storefront to scrape; SCRAPER_BASE_URL points the scraper at a stand-in
+# (e.g. python -m benchmarks.storefront). The A-Z listing is relative to it.
+BASE_URL = os.environ.get('SCRAPER_BASE_URL', 'https://makingcosmetics.com')
+LISTING_PATH = '/Ingredients-A-Z_ep_1.html?lang=default'
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+# Default fetch engine settings
+DEFAULT_WORKERS = 4
+DEFAULT_ASYNC_WORKERS = 32
+DEFAULT_VARIATION_CONCURRENCY = 4
 
-def run_scrape(limit: int | None = None) -> Dict[str, Any]:
+# Discovery: the A-Z listing is read in LISTING_CHUNK_SIZE chunks and its
+# product URLs are queued for the product workers as they are parsed, at most
+# DISCOVERY_QUEUE_SIZE ahead of them
+LISTING_CHUNK_SIZE = 64 * 1024
+DISCOVERY_QUEUE_SIZE = 256
+
+# Politeness budget: every request (listing, product, variation) of every
+# job draws a token from one shared bucket refilled at SCRAPER_RATE_LIMIT
+# requests/second (0 disables it), up to SCRAPER_RATE_BURST back-to-back.
+# A job's own rate_limit can only lower its rate further
+DEFAULT_RATE_LIMIT = 2.0
+DEFAULT_RATE_BURST = 4
+RATE_LIMIT = float(os.environ.get('SCRAPER_RATE_LIMIT', str(DEFAULT_RATE_LIMIT)))
+RATE_BURST = int(os.environ.get('SCRAPER_RATE_BURST', str(DEFAULT_RATE_BURST)))
+
+# On-disk HTTP cache shared by all runs; entries are revalidated with
+# If-None-Match / If-Modified-Since and evicted oldest-first above the size cap
+HTTP_CACHE_DIR = os.environ.get('SCRAPER_HTTP_CACHE_DIR', '.http_cache')
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Incremental mode: content hash and product record of every product page
+# from previous runs, used to skip extraction for byte-identical pages
+INCREMENTAL_STATE_PATH = os.environ.get('SCRAPER_STATE_PATH', '.scrape_state.json')
+
+# Checkpoints: every job records its completed products in a SQLite file,
+# committed every CHECKPOINT_EVERY products or CHECKPOINT_INTERVAL seconds, so
+# a resumed run can skip the pages an interrupted one already scraped.
+# Interrupted runs older than SCRAPER_CHECKPOINT_MAX_AGE seconds are pruned
+CHECKPOINT_PATH = os.environ.get('SCRAPER_CHECKPOINT_PATH', '.scrape_checkpoint.sqlite')
+CHECKPOINT_EVERY = 25
+CHECKPOINT_INTERVAL = 10.0
+CHECKPOINT_MAX_AGE = float(os.environ.get('SCRAPER_CHECKPOINT_MAX_AGE', str(7 * 24 * 3600)))
+
+# Result store: every job's run and products, persisted in SQLite (WAL mode)
+# so results survive restarts; products are inserted RESULT_BATCH_SIZE at a time
+RESULTS_DB_PATH = os.environ.get('SCRAPER_RESULTS_DB', '.scrape_results.sqlite')
+RESULT_BATCH_SIZE = 200
+
+# /results paging: default and maximum page size, and the product fields a
+# client may project (defaults are the format_product fields)
+RESULTS_PAGE_SIZE = 50
+RESULTS_MAX_PAGE_SIZE = 500
+RESULT_FIELDS = ('name', 'url', 'sizes', 'prices', 'price_info', 'price_sources')
+DEFAULT_RESULT_FIELDS = ('name', 'sizes', 'price_info', 'prices')
+
+# Media types of the /scrape_stream output formats
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+# Products /scrape_stream buffers for a slow client before the scrape waits
+STREAM_QUEUE_SIZE = 64
+
+# Job scheduling: scrape jobs allowed to run at once (the rest wait queued)
+# and finished jobs kept around for /jobs
+MAX_CONCURRENT_JOBS = int(os.environ.get('SCRAPER_MAX_JOBS', '2'))
+MAX_FINISHED_JOBS = 50
+# /scrape_stream runs outside the job pool; streams allowed at once
+MAX_CONCURRENT_STREAMS = int(os.environ.get('SCRAPER_MAX_STREAMS', str(MAX_CONCURRENT_JOBS)))
+
+# Parsing stage: with SCRAPER_PARSE_PROCESSES > 0, product pages are parsed in
+# one shared pool of that many processes, so fetch workers only do I/O;
+# 0 parses in the fetching thread
+PARSE_PROCESSES = int(os.environ.get('SCRAPER_PARSE_PROCESSES', '0'))
+
+# Scraper backends selectable per job: 'threads' uses requests.Session in a
+# worker pool, 'async' uses an httpx.AsyncClient on an event loop
+SCRAPER_BACKENDS = ('threads', 'async')
+
+# Prometheus metrics, served by /metrics from the default registry. Request
+# kinds are 'listing', 'product' and 'variation'; products/sec is
+# rate(scraper_products_total) (or the last run's average below)
+REQUESTS = Counter('scraper_requests', 'Storefront GETs by request kind and response status', ['kind', 'status'])
+FETCH_SECONDS = Histogram('scraper_fetch_seconds', 'Time to a storefront response, after rate limiting', ['kind'])
+RESPONSE_BYTES = Counter('scraper_response_bytes', 'Storefront response body bytes downloaded', ['kind'])
+PARSE_SECONDS = Histogram('scraper_parse_seconds', 'Product page parse time by stage (lxml, PageFeatures, extractors)',
+                          ['stage'], buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, 1))
+SCRAPED_PRODUCTS = Counter('scraper_products', 'Products scraped')
+LAST_RUN_PRODUCTS_PER_SECOND = Gauge('scraper_last_run_products_per_second', 'Average throughput of the last completed run')
+ACTIVE_WORKERS = Gauge('scraper_active_workers', 'Product pages being scraped right now')
+DISCOVERY_QUEUE_DEPTH = Gauge('scraper_discovery_queue_depth', 'Product URLs discovered and waiting for a worker')
+JOBS = Gauge('scraper_jobs', 'Scrape jobs by state', ['state'])
+
+# Discovery queues of the runs in progress, summed by DISCOVERY_QUEUE_DEPTH
+_discovery_queues: 'weakref.WeakSet[queue.Queue | asyncio.Queue]' = weakref.WeakSet()
+DISCOVERY_QUEUE_DEPTH.set_function(lambda: sum(links.qsize() for links in list(_discovery_queues)))
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _is_limited(limit) -> bool:
+    """Whether ``limit`` caps the product links visited (None, 0 or less: every link)"""
+    return limit is not None and isinstance(limit, int) and limit > 0
+
+
+def _start_run(limit: int | None) -> float:
+    logger.info("Starting product scraping..." + (f" (limit={limit})" if limit else ""))
+    return time.time()
+
+
+def load_incremental_state(path: str = INCREMENTAL_STATE_PATH) -> Dict[str, Dict[str, Any]]:
+    """Load the url -> {'hash', 'product'} map written by a previous incremental run"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable incremental state {path}: {str(e)}")
+        return {}
+
+
+_incremental_state_lock = threading.Lock()
+
+
+def save_incremental_state(updates: Dict[str, Dict[str, Any]], removed: Iterable[str] = (),
+                           path: str = INCREMENTAL_STATE_PATH) -> None:
+    """Merge one run's page records into the state file.
+
+    The file is re-read under a lock at save time, so jobs finishing side by
+    side each apply their own ``updates`` and ``removed`` URLs instead of
+    overwriting one another with the state they loaded at start.
+    """
+    with _incremental_state_lock:
+        state = load_incremental_state(path)
+        state.update(updates)
+        for url in removed:
+            state.pop(url, None)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class CheckpointStore:
+    """SQLite record of the products each unfinished run has completed.
+
+    A run is registered under an id (its job id) when it starts and deleted
+    when it completes, so only interrupted runs remain; those older than
+    ``max_age`` seconds are pruned whenever a run starts. Runs are claimed
+    while in use, so two jobs in this process never share or resume the same
+    one.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoint_runs (
+            run_id TEXT PRIMARY KEY,
+            started_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS checkpoint_products (
+            run_id TEXT NOT NULL,
+            url TEXT NOT NULL,
+            product TEXT NOT NULL,
+            PRIMARY KEY (run_id, url)
+        );
+    """
+
+    def __init__(self, path: str, max_age: float = CHECKPOINT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._active: set = set()
+        self._lock = threading.Lock()
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def start(self, run_id: str) -> None:
+        """Register a new run and claim it"""
+        with self._lock:
+            self._active.add(run_id)
+            active = list(self._active)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO checkpoint_runs (run_id, started_at) VALUES (?, ?)",
+                         (run_id, time.time()))
+            self._prune(conn, active)
+
+    def _prune(self, conn: sqlite3.Connection, active: List[str]) -> None:
+        """Drop interrupted runs older than max_age that nothing is using"""
+        stale = [row[0] for row in conn.execute("SELECT run_id FROM checkpoint_runs WHERE started_at < ?",
+                                                (time.time() - self.max_age,))
+                 if row[0] not in active]
+        for run_id in stale:
+            conn.execute("DELETE FROM checkpoint_products WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM checkpoint_runs WHERE run_id = ?", (run_id,))
+        if stale:
+            logger.info(f"Pruned {len(stale)} checkpoints older than {self.max_age:g} s")
+
+    def exists(self, run_id: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM checkpoint_runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def claim(self, run_id: str) -> str | None:
+        """Claim the interrupted run ``run_id``; None if there is none or it is in use"""
+        if not self.exists(run_id):
+            return None
+        with self._lock:
+            if run_id in self._active:
+                return None
+            self._active.add(run_id)
+        return run_id
+
+    def claim_latest(self) -> str | None:
+        """Claim the most recently started interrupted run not in use, if any"""
+        with closing(self._connect()) as conn:
+            run_ids = [row[0] for row in conn.execute("SELECT run_id FROM checkpoint_runs ORDER BY started_at DESC")]
+        with self._lock:
+            for run_id in run_ids:
+                if run_id not in self._active:
+                    self._active.add(run_id)
+                    return run_id
+        return None
+
+    def load(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """url -> product for every product ``run_id`` has checkpointed"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT url, product FROM checkpoint_products WHERE run_id = ? ORDER BY rowid",
+                                (run_id,)).fetchall()
+        return {url: json.loads(product) for url, product in rows}
+
+    def save(self, run_id: str, products: List[Dict[str, Any]]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO checkpoint_products (run_id, url, product) VALUES (?, ?, ?)",
+                             [(run_id, product['url'], json.dumps(product)) for product in products])
+
+    def finish(self, run_id: str) -> None:
+        """Drop a completed run's checkpoint"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM checkpoint_products WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM checkpoint_runs WHERE run_id = ?", (run_id,))
+        self.release(run_id)
+
+    def release(self, run_id: str) -> None:
+        """Give up the claim on a run, leaving its checkpoint to be resumed"""
+        with self._lock:
+            self._active.discard(run_id)
+
+
+_checkpoints: CheckpointStore | None = None
+_checkpoints_lock = threading.Lock()
+
+
+def get_checkpoints() -> CheckpointStore:
+    """The CheckpointStore at CHECKPOINT_PATH, opened on first use"""
+    global _checkpoints
+    with _checkpoints_lock:
+        if _checkpoints is None:
+            _checkpoints = CheckpointStore(CHECKPOINT_PATH)
+        return _checkpoints
+
+
+class ResultStore:
+    """SQLite store of scrape runs, their products and each product's variants.
+
+    Runs are keyed by job id. Products keep their scrape order (position) and
+    are indexed by run, name and URL; variants hold the sizes in order with
+    their price, so a stored run reads back as the run_scrape payload.
+    The database runs in WAL mode: the API reads while a job writes.
+    Runs left 'running' by a process that died are marked 'interrupted'
+    when the store is opened.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            scraped_at TEXT,
+            duration_sec REAL,
+            total_products INTEGER NOT NULL DEFAULT 0,
+            statistics TEXT,
+            timings TEXT,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS products (
+            product_id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            url TEXT,
+            name TEXT NOT NULL,
+            price_info TEXT NOT NULL,
+            price_sources TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS variants (
+            product_id INTEGER NOT NULL REFERENCES products (product_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            size TEXT NOT NULL,
+            price TEXT
+        );
+        CREATE INDEX IF NOT EXISTS products_run ON products (run_id, position);
+        CREATE INDEX IF NOT EXISTS products_name ON products (name);
+        CREATE INDEX IF NOT EXISTS products_url ON products (url);
+        CREATE INDEX IF NOT EXISTS variants_product ON variants (product_id, position);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The schema is created once here; WAL mode persists in the file
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            with conn:
+                interrupted = conn.execute(
+                    "UPDATE runs SET status = 'interrupted', finished_at = ?, error = ?, "
+                    "total_products = (SELECT COUNT(*) FROM products WHERE products.run_id = runs.run_id) "
+                    "WHERE status = 'running'",
+                    (_timestamp(), "Interrupted: the process stopped before the run finished; "
+                                   "resume=<job_id> continues it from its checkpoint")).rowcount
+            if interrupted:
+                logger.info(f"Marked {interrupted} unfinished runs as interrupted")
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def start_run(self, run_id: str, params: Dict[str, Any]) -> None:
+        with closing(self.connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO runs (run_id, status, params, started_at) VALUES (?, 'running', ?, ?)",
+                         (run_id, json.dumps(params), _timestamp()))
+
+    def finish_run(self, run_id: str, status: str, result: Dict[str, Any] | None = None,
+                   error: str | None = None) -> None:
+        result = result or {}
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ?, scraped_at = ?, duration_sec = ?, statistics = ?, "
+                "timings = ?, error = ?, total_products = (SELECT COUNT(*) FROM products WHERE run_id = ?) "
+                "WHERE run_id = ?",
+                (status, _timestamp(), result.get('scraped_at'), result.get('duration_sec'),
+                 json.dumps(result['statistics']) if 'statistics' in result else None,
+                 json.dumps(result['timings']) if 'timings' in result else None, error, run_id, run_id))
+
+    def add_products(self, conn: sqlite3.Connection, run_id: str, first_position: int,
+                     products: List[Dict[str, Any]]) -> None:
+        """Insert ``products`` (scraped order from ``first_position``) in one transaction"""
+        variants = []
+        with conn:
+            for position, product in enumerate(products, first_position):
+                cursor = conn.execute(
+                    "INSERT INTO products (run_id, position, url, name, price_info, price_sources) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, position, product.get('url'), product.get('name', ''), product.get('price_info', ''),
+                     json.dumps(sorted(product.get('price_sources', [])))))
+                prices = product.get('prices', {})
+                sizes = list(product.get('sizes', []))
+                sizes += [size for size in prices if size not in sizes]
+                variants.extend((cursor.lastrowid, i, size, prices.get(size)) for i, size in enumerate(sizes))
+            conn.executemany("INSERT INTO variants (product_id, position, size, price) VALUES (?, ?, ?, ?)", variants)
+
+    def list_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with closing(self.connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM runs ORDER BY started_at DESC, rowid DESC LIMIT ?", (limit,)).fetchall()
+        return [self._run_summary(row) for row in rows]
+
+    def run_summary(self, run_id: str) -> Dict[str, Any] | None:
+        with closing(self.connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return None if row is None else self._run_summary(row)
+
+    def _run_summary(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """A stored run in the shape of ScrapeJob.summary()"""
+        summary = {
+            'job_id': row['run_id'],
+            'status': row['status'],
+            'params': json.loads(row['params']),
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'progress': {'products_scraped': row['total_products']},
+            'error': row['error'],
+        }
+        if row['status'] == 'completed':
+            summary['result'] = {
+                'total_products': row['total_products'],
+                'scraped_at': row['scraped_at'],
+                'status': row['status'],
+                'duration_sec': row['duration_sec'],
+            }
+        return summary
+
+    def latest_run_id(self) -> str | None:
+        """Id of the most recently started completed run"""
+        with closing(self.connect()) as conn:
+            row = conn.execute("SELECT run_id FROM runs WHERE status = 'completed' "
+                               "ORDER BY started_at DESC, rowid DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def query_products(self, run_id: str, after: int = -1, limit: int = RESULTS_PAGE_SIZE,
+                       name_prefix: str | None = None, has_prices: bool | None = None, source: str | None = None,
+                       with_variants: bool = True) -> List[Dict[str, Any]]:
+        """One page of a run's products in scrape order, starting after position ``after``.
+
+        Args:
+            name_prefix: Only names starting with this (case-insensitive)
+            has_prices: Only products with (True) or without (False) prices
+            source: Only products priced by this extractor source
+            with_variants: Load sizes and prices (skip if not projected)
+        """
+        clauses = ["p.run_id = ?", "p.position > ?"]
+        args: List[Any] = [run_id, after]
+        if name_prefix:
+            escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("p.name LIKE ? ESCAPE '\\'")
+            args.append(escaped + '%')
+        if has_prices is not None:
+            clauses.append("p.price_info <> ''" if has_prices else "p.price_info = ''")
+        if source:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(p.price_sources) WHERE value = ?)")
+            args.append(source)
+
+        with closing(self.connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT p.product_id, p.position, p.url, p.name, p.price_info, p.price_sources FROM products p "
+                f"WHERE {' AND '.join(clauses)} ORDER BY p.position LIMIT ?", (*args, limit)).fetchall()
+            products = {
+                row['product_id']: {
+                    'position': row['position'], 'url': row['url'], 'name': row['name'], 'sizes': [],
+                    'prices': {}, 'price_info': row['price_info'], 'price_sources': json.loads(row['price_sources']),
+                }
+                for row in rows
+            }
+            if with_variants and products:
+                variants = conn.execute(
+                    f"SELECT product_id, size, price FROM variants WHERE product_id IN ({','.join('?' * len(products))}) "
+                    "ORDER BY product_id, position", list(products)).fetchall()
+                for variant in variants:
+                    product = products[variant['product_id']]
+                    product['sizes'].append(variant['size'])
+                    if variant['price'] is not None:
+                        product['prices'][variant['size']] = variant['price']
+        return list(products.values())
+
+    def run_result(self, run_id: str) -> Dict[str, Any] | None:
+        """A completed run read back as its run_scrape payload (None if not completed)"""
+        with closing(self.connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ? AND status = 'completed'", (run_id,)).fetchone()
+            if run is None:
+                return None
+            rows = conn.execute(
+                "SELECT p.product_id, p.name, p.price_info, v.size, v.price FROM products p "
+                "LEFT JOIN variants v ON v.product_id = p.product_id "
+                "WHERE p.run_id = ? ORDER BY p.position, v.position", (run_id,)).fetchall()
+
+        products: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            product = products.get(row['product_id'])
+            if product is None:
+                product = products[row['product_id']] = {
+                    'name': row['name'], 'sizes': [], 'price_info': row['price_info'], 'prices': {},
+                }
+            if row['size'] is not None:
+                product['sizes'].append(row['size'])
+                if row['price'] is not None:
+                    product['prices'][row['size']] = row['price']
+        return {
+            'success': True,
+            'total_products': len(products),
+            'products': list(products.values()),
+            'statistics': json.loads(run['statistics']) if run['statistics'] else {},
+            'scraped_at': run['scraped_at'],
+            'duration_sec': run['duration_sec'],
+            'timings': json.loads(run['timings']) if run['timings'] else {},
+            'status': run['status'],
+        }
+
+
+_results_store: ResultStore | None = None
+_results_store_lock = threading.Lock()
+
+
+def get_results_store() -> ResultStore:
+    """The ResultStore at RESULTS_DB_PATH, opened on first use"""
+    global _results_store
+    with _results_store_lock:
+        if _results_store is None:
+            _results_store = ResultStore(RESULTS_DB_PATH)
+        return _results_store
+
+
+def _open_checkpoint(checkpoint: str | None,
+                     resume: bool | str) -> tuple[str | None, Dict[str, Dict[str, Any]]]:
+    """Pick the checkpoint run id for a scrape and the products it already has.
+
+    With ``resume`` True, continue the latest interrupted run; with a run id,
+    continue that one (ValueError if it cannot be resumed). Otherwise (or if
+    there is none) start a new run under ``checkpoint`` (None: no checkpoint).
+    """
+    if resume:
+        checkpoints = get_checkpoints()
+        run_id = checkpoints.claim(resume) if isinstance(resume, str) else checkpoints.claim_latest()
+        if run_id is not None:
+            done = checkpoints.load(run_id)
+            logger.info(f"Resuming run {run_id}: {len(done)} products already scraped")
+            return run_id, done
+        if isinstance(resume, str):
+            raise ValueError(f"No interrupted run '{resume}' to resume, or it is in use")
+        logger.info("No interrupted run to resume; starting from scratch")
+    if checkpoint is not None:
+        get_checkpoints().start(checkpoint)
+    return checkpoint, {}
+
+
+def _make_scraper(backend: str, workers: int | None, rate_limit: float | None, use_cache: bool,
+                  incremental: bool, resumed: Dict[str, Dict[str, Any]] | None = None) -> 'MakingCosmeticsScraper':
+    """Build the scraper for one run from the endpoint/run_scrape options"""
+    if backend == 'async':
+        scraper_cls, default_workers = AsyncMakingCosmeticsScraper, DEFAULT_ASYNC_WORKERS
+    else:
+        scraper_cls, default_workers = MakingCosmeticsScraper, DEFAULT_WORKERS
+    return scraper_cls(
+        max_workers=workers or default_workers,
+        # Every scraper shares fetch_budget; rate_limit only adds a per-run cap
+        rate_limit=rate_limit or 0,
+        burst=RATE_BURST,
+        shared_limiter=fetch_budget,
+        cache=http_cache if use_cache else None,
+        previous_state=load_incremental_state() if incremental else None,
+        parse_pool=get_parse_pool(),
+        resumed=resumed,
+    )
+
+
+def format_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Public shape of a scraped product: focus on name, size, and price fields"""
+    return {
+        "name": product.get('name', ''),
+        "sizes": product.get('sizes', []),
+        "price_info": product.get('price_info', ''),
+        "prices": product.get('prices', {}),
+    }
+
+
+# Stage seconds of the product page being scraped in this thread / task
+_product_stages: contextvars.ContextVar[Dict[str, float] | None] = contextvars.ContextVar('product_stages', default=None)
+
+
+class StageTimings:
+    """Wall time one run spends in each stage, in total and per product.
+
+    Stages: discovery (reading the listing), politeness (waiting on the rate
+    limit and per-host slots), fetch (product pages), html / features (lxml
+    and PageFeatures), one per extract_variants_* method that ran, text_sizes,
+    variation (Product-Variation calls), serialization (writing products to
+    the sinks) and product (each product start to finish). Request stages
+    are summed per request, so a product's concurrent variation calls can
+    add up to more than its own wall time.
+    """
+
+    STAGES = ('discovery', 'politeness', 'fetch', 'html', 'features', 'options', 'json_ld', 'inline_json',
+              'tables', 'proximity', 'text_sizes', 'variation', 'serialization', 'product')
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, stage: str, seconds: float, product: Dict[str, float] | None = None) -> None:
+        """Count ``seconds`` towards ``product``'s stages if given, else the run total only"""
+        with self._lock:
+            if product is None:
+                self.totals[stage] += seconds
+            else:
+                product[stage] = product.get(stage, 0.0) + seconds
+
+    def add_product(self, stages: Dict[str, float]) -> None:
+        """Record one product's stage seconds as a sample of each stage"""
+        with self._lock:
+            for stage, seconds in stages.items():
+                self.totals[stage] += seconds
+                self.samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """{stage: {'total_sec', and for per-product stages 'products', 'p50_ms', 'p95_ms', 'p99_ms'}}"""
+        with self._lock:
+            totals, samples = dict(self.totals), {stage: sorted(values) for stage, values in self.samples.items()}
+        order = [stage for stage in self.STAGES if stage in totals] + sorted(set(totals) - set(self.STAGES))
+        summary = {}
+        for stage in order:
+            entry: Dict[str, Any] = {'total_sec': round(totals[stage], 3)}
+            values = samples.get(stage)
+            if values:
+                entry['products'] = len(values)
+                for q in self.PERCENTILES:
+                    # Nearest rank: the smallest value with at least q% of samples at or below it
+                    entry[f'p{q}_ms'] = round(values[max(0, math.ceil(len(values) * q / 100) - 1)] * 1000, 3)
+            summary[stage] = entry
+        return summary
+
+
+class ProductSink:
+    """Consumer of scraped products.
+
+    run_scrape and the endpoints pull products from the scraper's iterator
+    one at a time and hand each to their sinks, so nothing but the sinks
+    decides what stays in memory.
+    """
+
+    def write(self, product: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class ResultSink(ProductSink):
+    """Keeps the formatted products and statistics for the run_scrape payload.
+
+    With keep_products=False only the statistics are kept, for runs whose
+    products go to another sink (e.g. jobs, into the ResultStore).
+    """
+
+    def __init__(self, keep_products: bool = True):
+        self.keep_products = keep_products
+        self.products: List[Dict[str, Any]] = []
+        self.total_products = 0
+        self.products_with_sizes = 0
+        self.products_with_prices = 0
+
+    def write(self, product):
+        self.total_products += 1
+        if self.keep_products:
+            self.products.append(format_product(product))
+        if product.get('sizes'):
+            self.products_with_sizes += 1
+        if product.get('price_info') or product.get('prices'):
+            self.products_with_prices += 1
+
+
+class ProgressSink(ProductSink):
+    """Counts scraped products on a ScrapeJob"""
+
+    def __init__(self, job: 'ScrapeJob'):
+        self.job = job
+
+    def write(self, product):
+        self.job.products_scraped += 1
+
+
+class CallbackSink(ProductSink):
+    """Passes every product to a callable"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        self.callback = callback
+
+    def write(self, product):
+        self.callback(product)
+
+
+class CheckpointSink(ProductSink):
+    """Records completed products in the CheckpointStore, in batches"""
+
+    def __init__(self, store: CheckpointStore, run_id: str, every: int = CHECKPOINT_EVERY,
+                 interval: float = CHECKPOINT_INTERVAL):
+        self.store = store
+        self.run_id = run_id
+        self.every = every
+        self.interval = interval
+        self._batch: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+
+    def write(self, product):
+        if not product.get('url'):
+            return
+        self._batch.append(product)
+        if len(self._batch) >= self.every or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            self.store.save(self.run_id, self._batch)
+            self._batch = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        # Also runs when the scrape fails, keeping everything done so far
+        self.flush()
+
+
+class ResultStoreSink(ProductSink):
+    """Inserts products into the ResultStore in batches of RESULT_BATCH_SIZE"""
+
+    def __init__(self, store: ResultStore, run_id: str, batch_size: int = RESULT_BATCH_SIZE):
+        self.store = store
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self._batch: List[Dict[str, Any]] = []
+        self._written = 0
+        self._conn: sqlite3.Connection | None = None
+
+    def write(self, product):
+        self._batch.append(product)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        if self._conn is None:
+            # Async jobs write from their writer thread, sync jobs from the job thread
+            self._conn = self.store.connect()
+        self.store.add_products(self._conn, self.run_id, self._written, self._batch)
+        self._written += len(self._batch)
+        self._batch = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _checkpoint_sinks(run_id: str | None) -> List[ProductSink]:
+    return [] if run_id is None else [CheckpointSink(get_checkpoints(), run_id)]
+
+
+def drain_products(products: Iterable[Dict[str, Any]], sinks: List[ProductSink],
+                   timings: StageTimings | None = None) -> None:
+    """Feed every product from ``products`` to each sink, then close the sinks.
+
+    With ``timings``, the time spent in the sinks is recorded as the
+    serialization stage.
+    """
+    try:
+        for product in products:
+            _write_product(product, sinks, timings)
+    finally:
+        _close_sinks(sinks, timings)
+
+
+async def drain_products_async(products: AsyncIterator[Dict[str, Any]], sinks: List[ProductSink],
+                               timings: StageTimings | None = None) -> None:
+    """Async counterpart of drain_products.
+
+    The sinks run on one writer thread, so their blocking writes (SQLite
+    commits) never pause the event loop and the fetches in flight on it.
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='sink') as writer:
+        try:
+            async for product in products:
+                await loop.run_in_executor(writer, _write_product, product, sinks, timings)
+        finally:
+            await loop.run_in_executor(writer, _close_sinks, sinks, timings)
+
+
+def _write_product(product: Dict[str, Any], sinks: List[ProductSink], timings: StageTimings | None) -> None:
+    start = time.perf_counter()
+    for sink in sinks:
+        sink.write(product)
+    if timings is not None:
+        timings.add_product({'serialization': time.perf_counter() - start})
+
+
+def _close_sinks(sinks: List[ProductSink], timings: StageTimings | None) -> None:
+    start = time.perf_counter()
+    try:
+        for sink in sinks:
+            sink.close()
+    finally:
+        if timings is not None:
+            timings.add('serialization', time.perf_counter() - start)
+
+
+def _finish_run(scraper: 'MakingCosmeticsScraper', results: ResultSink, start_ts: float,
+                limit: int | None = None, run_id: str | None = None) -> Dict[str, Any]:
+    """Build the result payload for a completed run"""
+    if scraper.discovery_error is not None:
+        # Failing the run keeps the checkpoint and incremental state for the next attempt
+        raise RuntimeError(f"Product discovery failed: {scraper.discovery_error}")
+    duration = round(time.time() - start_ts, 2)
+    if duration > 0:
+        LAST_RUN_PRODUCTS_PER_SECOND.set(results.total_products / duration)
+    result: Dict[str, Any] = {
+        "success": True,
+        "total_products": results.total_products,
+        **({"products": results.products} if results.keep_products else {}),
+        "statistics": {
+            "products_with_sizes": results.products_with_sizes,
+            "products_with_prices": results.products_with_prices,
+        },
+        "scraped_at": _timestamp(),
+        "duration_sec": duration,
+        "timings": scraper.stage_timings.summary(),
+        "status": "completed",
+    }
+
+    if scraper.previous_state is not None:
+        # Incremental run: save the pages this run re-recorded; a complete run
+        # also drops the pages no longer listed, a limited one keeps the rest
+        complete = not _is_limited(limit)
+        previous = scraper.previous_state
+        updates = {url: entry for url, entry in scraper.page_state.items() if previous.get(url) is not entry}
+        removed = [url for url in previous if url not in scraper.page_state] if complete else []
+        save_incremental_state(updates, removed)
+        result["changes"] = scraper.change_report(complete=complete)
+
+    if scraper.resumed:
+        result["resumed"] = {"checkpoint": run_id, "products": len(scraper.resumed)}
+    if run_id is not None:
+        get_checkpoints().finish(run_id)
+
+    logger.info("Scraping completed successfully.")
+    return result
+
+
+def _fail_run(e: Exception, run_id: str | None = None) -> None:
+    logger.error(f"Scraping failed: {str(e)}")
+    if run_id is not None:
+        get_checkpoints().release(run_id)
+
+
+def run_scrape(limit: int | None = None, workers: int | None = None, backend: str = 'threads',
+               rate_limit: float | None = None, use_cache: bool = True, incremental: bool = False,
+               resume: bool | str = False, checkpoint: str | None = None,
+               sinks: List[ProductSink] | None = None, keep_products: bool = True) -> Dict[str, Any]:
     """Blocking scrape function that runs the MakingCosmetics scraper and
     returns a result payload similar to the old Flask response.
 
     Args:
         limit: Optional cap on number of product links to process (testing)
+        workers: Optional number of concurrent product fetch workers
+        backend: 'threads' (requests.Session) or 'async' (httpx.AsyncClient)
+        rate_limit: Optional requests/second cap for this run, on top of the
+            shared fetch budget (SCRAPER_RATE_LIMIT)
+        use_cache: Revalidate against the on-disk HTTP cache instead of
+            re-downloading unchanged pages
+        incremental: Reuse the stored record of byte-identical product pages
+            and report added/changed/unchanged/removed products
+        resume: Continue an interrupted run, reusing the products it
+            checkpointed instead of fetching them again: True for the latest
+            one, or the run (job) id to continue
+        checkpoint: Id to checkpoint this run under (None: no checkpoint,
+            unless resuming)
+        sinks: Extra ProductSinks fed each product as it is scraped
+        keep_products: Include the products in the returned payload (False
+            when a sink stores them, so memory stays flat)
     """
+    if backend == 'async':
+        return asyncio.run(run_scrape_async(limit=limit, workers=workers, rate_limit=rate_limit,
+                                            use_cache=use_cache, incremental=incremental,
+                                            resume=resume, checkpoint=checkpoint, sinks=sinks,
+                                            keep_products=keep_products))
+    run_id = None
     try:
-        scraping_status['is_running'] = True
-        scraping_status['error'] = None
-        start_ts = time.time()
+        start_ts = _start_run(limit)
+        run_id, resumed = _open_checkpoint(checkpoint, resume)
+        scraper = _make_scraper(backend, workers, rate_limit, use_cache, incremental, resumed)
+        results = ResultSink(keep_products)
+        drain_products(scraper.iter_products(limit=limit), [results, *_checkpoint_sinks(run_id), *(sinks or [])],
+                       scraper.stage_timings)
+        return _finish_run(scraper, results, start_ts, limit, run_id)
+    except Exception as e:
+        _fail_run(e, run_id)
+        raise
 
-        logger.info("Starting product scraping..." + (f" (limit={limit})" if limit else ""))
-        scraper = MakingCosmeticsScraper()
-        products = scraper.scrape_all_products(limit=limit)
 
-        # Focus on name, size, and price fields
-        formatted_products = []
-        for product in products:
-            formatted_product = {
-                "name": product.get('name', ''),
-                "sizes": product.get('sizes', []),
-                "price_info": product.get('price_info', ''),
-                "prices": product.get('prices', {}),
-            }
-            formatted_products.append(formatted_product)
-
-        duration = round(time.time() - start_ts, 2)
-        result: Dict[str, Any] = {
-            "success": True,
-            "total_products": len(formatted_products),
-            "products": formatted_products,
-            "statistics": {
-                "products_with_sizes": len([p for p in products if p.get('sizes')]),
-                "products_with_prices": len([p for p in products if p.get('price_info') or p.get('prices')]),
-            },
-            "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "duration_sec": duration,
-            "status": "completed",
-        }
+async def run_scrape_async(limit: int | None = None, workers: int | None = None, rate_limit: float | None = None,
+                           use_cache: bool = True, incremental: bool = False, resume: bool | str = False,
+                           checkpoint: str | None = None, sinks: List[ProductSink] | None = None,
+                           keep_products: bool = True) -> Dict[str, Any]:
+    """Coroutine counterpart of run_scrape using the asyncio scraper backend.
 
-        scraping_status['last_result'] = {
-            'total_products': result['total_products'],
-            'scraped_at': result['scraped_at'],
-            'status': result['status'],
-            'duration_sec': result['duration_sec'],
-        }
-        scraping_status['last_full_result'] = result
-        scraping_status['last_run'] = result['scraped_at']
-        logger.info("Scraping completed successfully.")
-        return result
+    Fetches run as coroutines on the current event loop; only HTML parsing is
+    handed to worker threads so the loop stays responsive. Jobs with the
+    async backend run this on an event loop in their job thread.
+    """
+    run_id = None
+    try:
+        start_ts = _start_run(limit)
+        run_id, resumed = _open_checkpoint(checkpoint, resume)
+        scraper = _make_scraper('async', workers, rate_limit, use_cache, incremental, resumed)
+        results = ResultSink(keep_products)
+        await drain_products_async(scraper.aiter_products(limit=limit),
+                                   [results, *_checkpoint_sinks(run_id), *(sinks or [])], scraper.stage_timings)
+        return _finish_run(scraper, results, start_ts, limit, run_id)
     except Exception as e:
-        error_msg = f"Scraping failed: {str(e)}"
-        logger.error(error_msg)
-        scraping_status['error'] = error_msg
-        scraping_status['last_result'] = {'status': 'failed'}
+        _fail_run(e, run_id)
         raise
-    finally:
-        scraping_status['is_running'] = False
+
+
+class ScrapeJob:
+    """One scrape request: its run_scrape options, status, progress and result"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = 'queued'  # queued -> running -> completed | failed
+        self.created_at = _timestamp()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.finished_ts = 0.0
+        self.products_scraped = 0
+        self.result: Dict[str, Any] | None = None
+        self.error: str | None = None
+        self.future: Future | None = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def last_result(self) -> Dict[str, Any]:
+        """Short outcome of a finished job, as reported by /status"""
+        if self.result is None:
+            return {'status': self.status}
+        return {
+            'total_products': self.result['total_products'],
+            'scraped_at': self.result['scraped_at'],
+            'status': self.result['status'],
+            'duration_sec': self.result['duration_sec'],
+        }
+
+    def full_result(self) -> Dict[str, Any] | None:
+        """The run_scrape payload; job products are read back from the result store"""
+        result = self.result
+        if result is None or 'products' in result:
+            return result
+        stored = get_results_store().run_result(self.id)
+        return {**result, 'products': stored['products'] if stored is not None else []}
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the job to finish; True if it did.
+
+        Awaits the job's future, so waiters wake the moment the job ends
+        rather than on a polling tick.
+        """
+        try:
+            # shield() keeps a timed-out waiter from cancelling a queued job
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.future)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_finished
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            'job_id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': {'products_scraped': self.products_scraped},
+            'error': self.error,
+        }
+        if self.result is not None:
+            summary['result'] = self.last_result()
+        return summary
+
+
+class JobManager:
+    """Runs scrape jobs on a bounded thread pool.
+
+    Up to ``max_concurrent_jobs`` jobs run at once; later ones wait queued.
+    All jobs draw from the shared fetch_budget, so running them side by side
+    never exceeds the politeness budget. Only the
+    newest MAX_FINISHED_JOBS finished jobs are kept. Jobs write their products
+    to the result store as they are scraped and keep only the outcome in
+    memory.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = MAX_CONCURRENT_JOBS):
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix='job')
+        self._jobs: Dict[str, ScrapeJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, **params) -> ScrapeJob:
+        """Queue a job; ``params`` are run_scrape keyword arguments"""
+        job = ScrapeJob(params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ScrapeJob) -> None:
+        job.status = 'running'
+        job.started_at = _timestamp()
+        try:
+            get_results_store().start_run(job.id, job.params)
+            # Products go straight to the result store; full_result() reads them back
+            job.result = run_scrape(**job.params, checkpoint=job.id, keep_products=False,
+                                    sinks=[ProgressSink(job), ResultStoreSink(get_results_store(), job.id)])
+            job.status = 'completed'
+        except Exception as e:
+            job.error = f"Scraping failed: {str(e)}"
+            job.status = 'failed'
+        finally:
+            job.finished_ts = time.time()
+            job.finished_at = _timestamp()
+            try:
+                get_results_store().finish_run(job.id, job.status, job.result, job.error)
+            except sqlite3.Error as e:
+                logger.error(f"Could not record job {job.id} in the result store: {str(e)}")
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> ScrapeJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ScrapeJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def is_running(self) -> bool:
+        return any(job.status == 'running' for job in self.list())
+
+    def latest_finished(self, status: str | None = None) -> ScrapeJob | None:
+        """Most recently finished job, optionally only those with ``status``"""
+        finished = [job for job in self.list() if job.is_finished and (status is None or job.status == status)]
+        return max(finished, key=lambda job: job.finished_ts, default=None)
+
+
+job_manager = JobManager()
+for _state in ('queued', 'running'):
+    JOBS.labels(_state).set_function(lambda state=_state: sum(job.status == state for job in job_manager.list()))
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in SCRAPER_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown backend '{backend}', expected one of {', '.join(SCRAPER_BACKENDS)}")
+
+
+def _resume_option(resume: str | None) -> bool | str:
+    """The run_scrape resume option for a resume query param: true/false or a job id"""
+    if resume is None or resume.lower() in ('', 'false', '0', 'no', 'off'):
+        return False
+    if resume.lower() in ('true', '1', 'yes', 'on'):
+        return True
+    if not get_checkpoints().exists(resume):
+        raise HTTPException(status_code=404, detail=f"No interrupted job '{resume}' to resume")
+    return resume
 
 
 @app.get('/health')
 def health_check():
     return {
         'status': 'healthy',
-        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'timestamp': _timestamp(),
         'scraping_status': {
-            'is_running': scraping_status['is_running'],
-            'last_run': scraping_status['last_run'],
+            'is_running': job_manager.is_running(),
+            'last_run': _last_run(),
         },
     }
 
 
+def _last_run() -> str | None:
+    last_completed = job_manager.latest_finished('completed')
+    return last_completed.result['scraped_at'] if last_completed else None
+
+
 @app.post('/scrape_async')
-async def scrape_async(background_tasks: BackgroundTasks, wait: bool = False, timeout: int = 120, limit: int | None = None):
-    """Start scraping in the background. Optionally wait for completion.
+async def scrape_async(wait: bool = False, timeout: int = 120, limit: int | None = None,
+                       workers: int | None = None, backend: str = 'threads', rate_limit: float | None = None,
+                       cache: bool = True, incremental: bool = False, resume: str | None = None):
+    """Start a scrape job in the background. Optionally wait for completion.
+
+    Returns the job id; progress and results are at /jobs/{job_id}. Up to
+    MAX_CONCURRENT_JOBS jobs run side by side sharing one fetch budget.
 
     Query params:
     - wait: if true, wait up to `timeout` seconds for completion
     - timeout: seconds to wait when wait=true
     - limit: optional cap on number of product links to process (testing)
+    - workers: optional number of concurrent product fetch workers
+    - backend: 'threads' (default) or 'async' to run the fetches as coroutines
+    - rate_limit: optional requests/second cap for this job; all jobs share
+      one budget of SCRAPER_RATE_LIMIT requests/second (bursts of up to
+      SCRAPER_RATE_BURST), set in the environment (0 disables it)
+    - cache: revalidate against the on-disk HTTP cache (default true)
+    - incremental: skip extraction for product pages unchanged since the last
+      incremental run and include a change report
+    - resume: continue an interrupted job from its checkpoint, reusing the
+      products it already scraped instead of fetching them again: true for
+      the latest one, or the job id of the one to continue (404 if it has no
+      checkpoint)
     """
-    if scraping_status['is_running']:
-        if wait:
-            deadline = time.time() + max(1, timeout)
-            while scraping_status['is_running'] and time.time() < deadline:
-                await asyncio.sleep(1)
-            if not scraping_status['is_running'] and scraping_status.get('last_full_result') is not None:
-                return scraping_status['last_full_result']
-            return {'status': 'running'}
-        return {'status': 'running'}
-
-    # queue background task with limit
-    background_tasks.add_task(run_scrape, limit)
+    _check_backend(backend)
+    job = job_manager.submit(limit=limit, workers=workers, backend=backend, rate_limit=rate_limit,
+                             use_cache=cache, incremental=incremental, resume=_resume_option(resume))
 
     if wait:
-        deadline = time.time() + max(1, timeout)
-        while scraping_status['is_running'] and time.time() < deadline:
-            await asyncio.sleep(1)
-        if not scraping_status['is_running'] and scraping_status.get('last_full_result') is not None:
-            return scraping_status['last_full_result']
-        return {'status': 'running'}
+        await job.wait(timeout=max(1, timeout))
+        if job.result is not None:
+            return {**job.full_result(), 'job_id': job.id}
+        return {'status': job.status, 'job_id': job.id, 'error': job.error}
+
+    return {'status': 'accepted', 'job_id': job.id}
+
+
+@app.get('/jobs')
+def list_jobs():
+    return {'jobs': [job.summary() for job in job_manager.list()]}
+
+
+@app.get('/jobs/{job_id}')
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is not None:
+        return job.summary()
+    # Pruned, or from before a restart
+    summary = get_results_store().run_summary(job_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return summary
+
+
+@app.get('/jobs/{job_id}/result')
+def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        summary = get_job(job_id)
+        if summary['status'] != 'completed':
+            raise HTTPException(status_code=500 if summary['status'] in ('failed', 'interrupted') else 409,
+                                detail=summary['error'] or f"Job '{job_id}' is {summary['status']}")
+        return get_results_store().run_result(job_id)
+    if job.status == 'failed':
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.result is None:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job.status}")
+    return job.full_result()
+
+
+def _encode_cursor(run_id: str, position: int) -> str:
+    return base64.urlsafe_b64encode(f"{run_id}:{position}".encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, run_id: str) -> int:
+    """Position a /results cursor continues after; 400 if it is malformed or from another run"""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        cursor_run, position = decoded.rsplit(':', 1)
+        if cursor_run != run_id:
+            raise ValueError(cursor_run)
+        return int(position)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor for this run")
+
+
+@app.get('/results')
+def results(run_id: str | None = None, cursor: str | None = None, limit: int = RESULTS_PAGE_SIZE,
+            fields: str | None = None, name_prefix: str | None = None, has_prices: bool | None = None,
+            source: str | None = None):
+    """Page through the products of a stored run.
+
+    Query params:
+    - run_id: job id of a completed run (default: the latest one)
+    - cursor: next_cursor from the previous page
+    - limit: products per page (max RESULTS_MAX_PAGE_SIZE)
+    - fields: comma-separated projection, e.g. name,prices (default: name,
+      sizes, price_info, prices; also available: url, price_sources)
+    - name_prefix: only products whose name starts with this (case-insensitive)
+    - has_prices: only products with (true) or without (false) prices
+    - source: only products priced by this extractor, e.g. json_ld or table
+    """
+    selected = DEFAULT_RESULT_FIELDS if not fields else tuple(f.strip() for f in fields.split(',') if f.strip())
+    unknown = [field for field in selected if field not in RESULT_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {', '.join(unknown)}; expected any of {', '.join(RESULT_FIELDS)}")
+
+    results_store = get_results_store()
+    run_id = run_id or results_store.latest_run_id()
+    if run_id is None or results_store.run_summary(run_id) is None:
+        raise HTTPException(status_code=404, detail="No stored run" if run_id is None else f"Unknown run '{run_id}'")
+    after = _decode_cursor(cursor, run_id) if cursor else -1
+    limit = max(1, min(limit, RESULTS_MAX_PAGE_SIZE))
+
+    # One extra row tells whether there is a next page
+    rows = results_store.query_products(run_id, after=after, limit=limit + 1, name_prefix=name_prefix,
+                                        has_prices=has_prices, source=source,
+                                        with_variants='sizes' in selected or 'prices' in selected)
+    page = rows[:limit]
+    return {
+        'run_id': run_id,
+        'products': [{field: product[field] for field in selected} for product in page],
+        'next_cursor': _encode_cursor(run_id, page[-1]['position']) if len(rows) > limit else None,
+    }
+
+
+@app.get('/runs')
+def list_runs(limit: int = 20):
+    """Stored runs, newest first; unlike /jobs this survives restarts"""
+    return {'runs': get_results_store().list_runs(limit=max(1, min(limit, 200)))}
+
+
+_stream_slots = threading.BoundedSemaphore(max(1, MAX_CONCURRENT_STREAMS))
+
+
+@app.get('/scrape_stream')
+async def scrape_stream(format: str = 'ndjson', limit: int | None = None, workers: int | None = None,
+                        backend: str = 'threads', rate_limit: float | None = None, cache: bool = True):
+    """Scrape and stream each product the moment it is scraped.
+
+    Query params:
+    - format: 'ndjson' (one product per line, then a final
+      {"status": "completed", "total_products": N} or
+      {"status": "failed", "error": ...} line) or 'sse' (Server-Sent Events;
+      'product' events followed by a final 'done' or 'error' event)
+    - limit, workers, backend, rate_limit, cache: as for /scrape_async
+
+    Products are emitted in listing order. At most STREAM_QUEUE_SIZE products
+    wait for a slow client; the scrape pauses until it catches up. Streamed
+    runs are not jobs but share the SCRAPER_RATE_LIMIT / SCRAPER_RATE_BURST
+    fetch budget with them; up to MAX_CONCURRENT_STREAMS run at once (429
+    beyond that).
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}', expected one of {', '.join(STREAM_FORMATS)}")
+    _check_backend(backend)
+    if not _stream_slots.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail=f"{MAX_CONCURRENT_STREAMS} streams already running")
+    try:
+        scraper = _make_scraper(backend, workers, rate_limit, cache, incremental=False)
+    except Exception:
+        _stream_slots.release()
+        raise
+    loop = asyncio.get_running_loop()
+    ready: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    closed = threading.Event()
+    end_of_stream = object()
+
+    def emit(product):
+        # Block the scrape thread while the queue is full, but give up once the client is gone
+        put = asyncio.run_coroutine_threadsafe(ready.put(product), loop)
+        while True:
+            try:
+                return put.result(timeout=0.1)
+            except FutureTimeoutError:
+                if closed.is_set():
+                    put.cancel()
+                    return
+
+    async def produce():
+        try:
+            if backend == 'async':
+                async with aclosing(scraper.aiter_products(limit=limit)) as products:
+                    async for product in products:
+                        await ready.put(product)
+            else:
+                await asyncio.to_thread(drain_products, scraper.iter_products(limit=limit), [CallbackSink(emit)])
+            if scraper.discovery_error is not None:
+                raise RuntimeError(f"Product discovery failed: {scraper.discovery_error}")
+        except Exception as e:
+            logger.error(f"Streaming scrape failed: {str(e)}")
+            if not closed.is_set():
+                await ready.put(e)
+        finally:
+            if not closed.is_set():
+                await ready.put(end_of_stream)
+
+    def encode(event, payload):
+        data = json.dumps(payload)
+        if format == 'sse':
+            return f"event: {event}\ndata: {data}\n\n"
+        return data + "\n"
+
+    async def body():
+        producer = asyncio.create_task(produce())
+        count = 0
+        failed = False
+        try:
+            while True:
+                item = await ready.get()
+                if item is end_of_stream:
+                    break
+                if isinstance(item, Exception):
+                    failed = True
+                    yield encode('error', {'status': 'failed', 'error': f"Scraping failed: {str(item)}"})
+                    continue
+                count += 1
+                yield encode('product', format_product(item))
+            if not failed:
+                yield encode('done', {'status': 'completed', 'total_products': count})
+        finally:
+            # Client went away (or we finished): stop scheduling new pages
+            closed.set()
+            scraper.cancel()
+            if not producer.done():
+                producer.cancel()
+            _stream_slots.release()
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[format])
 
-    return {'status': 'accepted'}
+
+@app.get('/metrics')
+def metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get('/status')
 def status():
+    latest = job_manager.latest_finished()
     return {
-        'is_running': scraping_status['is_running'],
-        'last_run': scraping_status['last_run'],
-        'last_result': scraping_status['last_result'],
-        'error': scraping_status['error'],
+        'is_running': job_manager.is_running(),
+        'last_run': _last_run(),
+        'last_result': latest.last_result() if latest else None,
+        'error': latest.error if latest else None,
+        'active_jobs': [job.summary() for job in job_manager.list() if not job.is_finished],
     }
 
-class MakingCosmeticsScraper:
-    def __init__(self):
-        self.base_url = "https://makingcosmetics.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.products = []
-        
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens refill at ``rate`` per second up to ``burst``. reserve() takes a
+    token (possibly going into debt) and returns how long the caller has to
+    wait for it, so sync callers sleep and async callers await without ever
+    holding the lock. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HTTPCache:
+    """Disk-backed cache of GET responses keyed by URL.
+
+    Each entry is a body file plus a JSON metadata file holding the validators
+    (ETag / Last-Modified) and content type. Only responses carrying a
+    validator are stored, since they are always revalidated before reuse.
+    When the bodies exceed ``max_bytes`` the least recently used entries are
+    evicted.
+    """
+
+    # Response headers kept with a cached body
+    KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+    def __init__(self, directory: str, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def lookup(self, url) -> Dict[str, Any] | None:
+        """Return the cached entry for ``url`` ({'headers', 'body'}) or None"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                headers = json.load(f)['headers']
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return {'headers': headers, 'body': body}
+
+    def conditional_headers(self, entry) -> Dict[str, str]:
+        """Revalidation headers for a cached entry"""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def touch(self, url) -> None:
+        """Mark an entry as recently used (revalidated with a 304)"""
+        body_path, _ = self._paths(url)
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+    def store(self, url, headers, body: bytes) -> None:
+        """Store a 200 response if it can be revalidated later"""
+        kept = {name: headers[name] for name in self.KEPT_HEADERS if headers.get(name)}
+        if not (kept.get('ETag') or kept.get('Last-Modified')):
+            return
+        if 'no-store' in (headers.get('Cache-Control') or ''):
+            return
+
+        body_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._lock:
+                total = self._current_total()
+                previous = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+                # Write to temp files then rename so readers never see partial entries
+                for path, data in ((body_path, body), (meta_path, json.dumps({'url': url, 'headers': kept}).encode('utf-8'))):
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                self._total_bytes = total - previous + len(body)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            logger.debug(f"Could not cache {url}: {str(e)}")
+
+    def _current_total(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        return self._total_bytes
+
+    def _entries(self):
+        """(body_path, size, last_used) for every cached body"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.body'):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes (lock held)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for body_path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            for path in (body_path, body_path[:-len('.body')] + '.json'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self._total_bytes = total
+
+
+http_cache = HTTPCache(HTTP_CACHE_DIR)
+
+# The fetch budget shared by every scraper in the process
+fetch_budget = TokenBucket(RATE_LIMIT, RATE_BURST)
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor | None:
+    """Shared page-parsing process pool, started on first use (None if disabled)"""
+    global _parse_pool
+    if PARSE_PROCESSES <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn, not fork: the parent runs fetch threads and an event loop
+            _parse_pool = ProcessPoolExecutor(PARSE_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
+        return _parse_pool
+
+
+# Compiled XPath selectors, built once at import and shared by every page and
+# worker thread. lxml serialises concurrent evaluations of one XPath object,
+# which is fine for these short per-candidate queries. Text results are plain
+# strings (smart_strings=False): no caller needs the parent back-reference.
+XPATHS = {
+    'table_header_texts': etree.XPath('.//th//text() | .//td[1]//text()', smart_strings=False),
+    'table_body_rows': etree.XPath('.//tr[position()>1]'),
+    'row_cell_texts': etree.XPath('.//td//text()', smart_strings=False),
+}
+
+# Tags of every product-page extractor candidate; lxml matches them in C
+# during a single document traversal
+PAGE_CANDIDATE_TAGS = ('h1', 'div', 'title', 'span', 'script', 'select', 'option', 'input', 'ul', 'table')
+
+
+def _subtree_texts(roots):
+    """Text nodes under ``roots`` in document order, like ``(r1 | r2 ...)//text()``"""
+    members = set(roots)
+    texts = []
+    for root in roots:
+        # A nested root's text is already part of its enclosing root's
+        if any(ancestor in members for ancestor in root.iterancestors()):
+            continue
+        texts.extend(root.itertext())
+    return texts
+
+
+class PageFeatures:
+    """Everything the product-page extractors read, collected in one walk.
+
+    One traversal over the PAGE_CANDIDATE_TAGS elements sorts the candidate
+    nodes of every extractor into the same lists (and document order) the
+    per-extractor XPath selectors used to produce:
+
+    - name_texts: text under h1.product-name (exact class), h1 *product-title*,
+      div *product-name* and <title>, one list per selector in priority order
+    - size_options / variation_options: options of size selects and of
+      ``dwvar_`` selects
+    - base_price_texts: text under span *price* / div *sales*
+    - radios, option_lists, json_ld_texts, tables
+    - script_texts: every non-empty <script> body, for the inline JSON scanner
+
+    The text fallbacks (texts, and TextNodeIndex for proximity) only run when
+    the extractors before them found nothing, so they are computed on demand.
+    """
+
+    def __init__(self, tree):
+        self.root = tree.getroottree().getroot()
+        name_roots = [[], [], [], []]
+        base_price_roots = []
+        json_ld_roots = []
+        self.size_options = []
+        self.variation_options = []
+        self.radios = []
+        self.option_lists = []
+        self.tables = []
+        self.script_texts: List[str] = []
+
+        # Size / dwvar_ selects, so their options can be checked by ancestry
+        size_selects = set()
+        variation_selects = set()
+
+        for el in self.root.iter(*PAGE_CANDIDATE_TAGS):
+            tag = el.tag
+            cls = el.get('class') or ''
+            if tag == 'h1':
+                if el.get('class') == 'product-name':
+                    name_roots[0].append(el)
+                if 'product-title' in cls:
+                    name_roots[1].append(el)
+            elif tag == 'div':
+                if 'product-name' in cls:
+                    name_roots[2].append(el)
+                if 'sales' in cls:
+                    base_price_roots.append(el)
+            elif tag == 'title':
+                name_roots[3].append(el)
+            elif tag == 'span':
+                if 'price' in cls:
+                    base_price_roots.append(el)
+            elif tag == 'script':
+                if el.text:
+                    self.script_texts.append(el.text)
+                if el.get('type') == 'application/ld+json':
+                    json_ld_roots.append(el)
+            elif tag == 'select':
+                name = el.get('name') or ''
+                if 'select-Size' in cls or 'size' in name:
+                    size_selects.add(el)
+                if 'dwvar_' in name:
+                    variation_selects.add(el)
+            elif tag == 'option':
+                if size_selects or variation_selects:
+                    selects = list(el.iterancestors('select'))
+                    if any(select in size_selects for select in selects):
+                        self.size_options.append(el)
+                    if any(select in variation_selects for select in selects):
+                        self.variation_options.append(el)
+            elif tag == 'input':
+                name = el.get('name') or ''
+                if el.get('type') == 'radio' and ('size' in name or 'option' in name):
+                    self.radios.append(el)
+            elif tag == 'ul':
+                parent = el.getparent()
+                if ('option' in cls or 'size' in cls
+                        or (parent is not None and parent.tag == 'div' and 'option' in (parent.get('class') or ''))):
+                    self.option_lists.append(el)
+            elif tag == 'table':
+                self.tables.append(el)
+
+        self.name_texts: List[List[str]] = [_subtree_texts(roots) for roots in name_roots]
+        self.base_price_texts = _subtree_texts(base_price_roots)
+        self.json_ld_texts = _subtree_texts(json_ld_roots)
+
+    @property
+    def texts(self) -> List[str]:
+        """Every text node of the document, for the free-text size fallback"""
+        return list(self.root.itertext())
+
+
+class TextNodeIndex:
+    """One-pass index of the elements that own text nodes.
+
+    Every element gets its document (preorder) position and the position of
+    its last descendant, so "descendants of X that own text" is a slice of
+    the sorted text-owner positions. The leading text of each text owner is
+    parsed once for a size and a two-decimal price.
+    """
+
+    def __init__(self, page: PageFeatures):
+        self.elements = [el for el in page.root.iter() if isinstance(el.tag, str)]
+        self.position = {el: i for i, el in enumerate(self.elements)}
+
+        # Position of the last descendant, filled bottom-up
+        self.end = list(range(len(self.elements)))
+        for i in range(len(self.elements) - 1, -1, -1):
+            for child in reversed(self.elements[i]):
+                if isinstance(child.tag, str):
+                    self.end[i] = self.end[self.position[child]]
+                    break
+
+        self.text_positions: List[int] = []
+        self.sizes: Dict[int, str] = {}
+        self.prices: Dict[int, str] = {}
+        for i, el in enumerate(self.elements):
+            # Same test as XPath [text()]: leading text or the tail of any child
+            if not (el.text or any(child.tail for child in el)):
+                continue
+            self.text_positions.append(i)
+            text = el.text or ''
+            size = parse_size(text)
+            if size:
+                self.sizes[i] = size
+            price = parse_price(text, require_cents=True)
+            if price:
+                self.prices[i] = price
+
+    def text_descendants(self, i) -> List[int]:
+        """Positions of the proper descendants of element ``i`` that own text"""
+        lo = bisect_left(self.text_positions, i + 1)
+        hi = bisect_right(self.text_positions, self.end[i])
+        return self.text_positions[lo:hi]
+
+
+class MakingCosmeticsScraper:
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, per_host_concurrency: int | None = None,
+                 rate_limit: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST,
+                 variation_concurrency: int = DEFAULT_VARIATION_CONCURRENCY, shared_limiter: TokenBucket | None = None,
+                 cache: HTTPCache | None = None, previous_state: Dict[str, Dict[str, Any]] | None = None,
+                 parse_pool: ProcessPoolExecutor | None = None,
+                 resumed: Dict[str, Dict[str, Any]] | None = None, session: requests.Session | None = None,
+                 base_url: str | None = None):
+        """
+        Args:
+            max_workers: Number of product pages scraped concurrently
+            per_host_concurrency: Max in-flight requests to any single host
+                (defaults to max_workers)
+            rate_limit: Requests/second allowed across all request types
+                (0 disables this scraper's own limit)
+            burst: Requests allowed back-to-back before rate_limit applies
+            variation_concurrency: Max concurrent Product-Variation calls per product
+            shared_limiter: TokenBucket shared with other scrapers, applied
+                in addition to rate_limit
+            cache: Optional on-disk HTTPCache used for conditional requests
+            previous_state: url -> {'hash', 'product'} from an earlier run;
+                enables incremental mode (None disables it)
+            parse_pool: Optional process pool that parses product pages
+                (None parses in the fetching thread)
+            resumed: url -> product checkpointed by an interrupted run; those
+                pages are not fetched again
+            session: requests.Session to fetch through (e.g. a corpus replay
+                session); a new one by default
+            base_url: Storefront root URL (defaults to BASE_URL)
+        """
+        self.base_url = (base_url or BASE_URL).rstrip('/')
+        self.listing_url = urljoin(self.base_url, LISTING_PATH)
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_concurrency = max(1, int(per_host_concurrency or self.max_workers))
+        self.limiter = TokenBucket(rate_limit, burst)
+        self.shared_limiter = shared_limiter
+        self.cache = cache
+        self.previous_state = previous_state
+        self.parse_pool = parse_pool
+        self.resumed = resumed or {}
+        self.page_state: Dict[str, Dict[str, Any]] = {}
+        self.page_changes: Dict[str, str] = {}
+        self.stage_timings = StageTimings()
+        # Set when the listing could not be fetched, so the run is not mistaken for a complete one
+        self.discovery_error: str | None = None
+        self._cancelled = threading.Event()
+        self.variation_concurrency = max(1, int(variation_concurrency))
+        self._init_transport(session)
+        # Threads for Product-Variation calls, shared by every product of a run
+        self._variation_executor: ThreadPoolExecutor | None = None
+        self._variation_executor_lock = threading.Lock()
+        self.products = []
+
+    def _init_transport(self, session):
+        """Set up the pooled requests.Session and per-host slots used by _get"""
+        self.session = session if session is not None else requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        # Size the connection pool so concurrent workers (and their variation
+        # calls) don't discard connections
+        pool_size = self.max_workers * self.variation_concurrency
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        """Return the semaphore bounding in-flight requests to the host of ``url``"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_concurrency)
+                self._host_slots[host] = slot
+        return slot
+
+    def _get(self, url, **kwargs):
+        """GET ``url`` through the shared session within the rate limit and per-host budget.
+
+        With a cache configured, a cached copy is revalidated and a 304 is
+        answered from disk as a regular 200 response.
+        """
+        cached = self._prepare_conditional(url, kwargs)
+        waiting = time.perf_counter()
+        self.limiter.acquire()
+        if self.shared_limiter is not None:
+            self.shared_limiter.acquire()
+        kind = self._request_kind(url)
+        with self._host_slot(url):
+            self._record_stage('politeness', time.perf_counter() - waiting)
+            with self._observe_fetch(kind):
+                response = self.session.get(url, **kwargs)
+        REQUESTS.labels(kind, response.status_code).inc()
+        if not kwargs.get('stream'):
+            RESPONSE_BYTES.labels(kind).inc(len(response.content))
+
+        if cached is not None and response.status_code == 304:
+            self.cache.touch(url)
+            cached_response = requests.Response()
+            cached_response.status_code = 200
+            cached_response._content = cached['body']
+            cached_response._content_consumed = True  # iter_content reads _content
+            cached_response.from_cache = True
+            cached_response.headers = CaseInsensitiveDict(cached['headers'])
+            cached_response.encoding = requests.utils.get_encoding_from_headers(cached_response.headers)
+            cached_response.url = response.url
+            cached_response.request = response.request
+            return cached_response
+        # A streamed body is stored by its reader once complete (_stored_body)
+        if not kwargs.get('stream'):
+            self._store_in_cache(url, response)
+        return response
+
+    def _request_kind(self, url):
+        """Metrics label of a storefront URL: 'listing', 'variation' or 'product'"""
+        if url == self.listing_url:
+            return 'listing'
+        return 'variation' if 'Product-Variation' in url else 'product'
+
+    @contextmanager
+    def _observe_fetch(self, kind):
+        """Time a fetch into FETCH_SECONDS and its stage, counting it as an 'error' request if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            REQUESTS.labels(kind, 'error').inc()
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            FETCH_SECONDS.labels(kind).observe(seconds)
+            if kind != 'listing':  # Part of discovery
+                self._record_stage('fetch' if kind == 'product' else 'variation', seconds)
+
+    def _record_stage(self, stage, seconds):
+        """Add to the current product's stage, or to the run total outside a product"""
+        self.stage_timings.add(stage, seconds, _product_stages.get())
+
+    @contextmanager
+    def _timing_product(self):
+        """Collect the stages of the product scraped inside the block as one sample"""
+        stages: Dict[str, float] = {}
+        token = _product_stages.set(stages)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _product_stages.reset(token)
+            stages['product'] = time.perf_counter() - start
+            self.stage_timings.add_product(stages)
+
+    def _timed_links(self, links: Iterator[str]) -> Iterator[str]:
+        """Pass product URLs through, recording the time spent producing them as discovery"""
+        with closing(links):
+            while True:
+                start = time.perf_counter()
+                product_url = next(links, _DISCOVERY_DONE)
+                self._record_stage('discovery', time.perf_counter() - start)
+                if product_url is _DISCOVERY_DONE:
+                    return
+                yield product_url
+
+    def _prepare_conditional(self, url, kwargs):
+        """Look up ``url`` in the cache and add revalidation headers to kwargs"""
+        if self.cache is None:
+            return None
+        cached = self.cache.lookup(url)
+        if cached is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.conditional_headers(cached)}
+        return cached
+
+    def _store_in_cache(self, url, response, body: bytes | None = None):
+        if self.cache is not None and response.status_code == 200 and not getattr(response, 'from_cache', False):
+            self.cache.store(url, response.headers, response.content if body is None else body)
+
+    def _stored_body(self, url, response, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass a streamed body through, caching it once it has been read in full"""
+        body = []
+        downloaded = RESPONSE_BYTES.labels(self._request_kind(url))
+        for chunk in chunks:
+            body.append(chunk)
+            if not getattr(response, 'from_cache', False):
+                downloaded.inc(len(chunk))
+            yield chunk
+        self._store_in_cache(url, response, b''.join(body))
+
     def get_all_product_links(self):
         """Find all product links from the comprehensive Ingredients A-Z list page"""
-        product_links = set()
-        
+        return list(self.iter_product_links())
+
+    def iter_product_links(self) -> Iterator[str]:
+        """Yield product URLs from the Ingredients A-Z list page as its body streams in.
+
+        URLs come in document order without repeats, so runs over the same
+        listing visit products in the same order.
+        """
         # Use the comprehensive product list page
-        list_page_url = "https://makingcosmetics.com/Ingredients-A-Z_ep_1.html?lang=default"
-        
+        list_page_url = self.listing_url
+        found = 0
+
         try:
-            # logger.info("Fetching comprehensive product list from Ingredients A-Z page...")
-            response = self.session.get(list_page_url, timeout=15)
-            response.raise_for_status()
-            tree = html.fromstring(response.content)
-            
-            # Find all product links on the comprehensive list page
-            all_links = tree.xpath('//a/@href')
-            
-            for link in all_links:
-                if link and self.is_product_url(link):
-                    # Normalize URL by removing problematic query parameters
-                    normalized_link = link.replace('?lang=default', '')
-                    full_url = urljoin(self.base_url, normalized_link)
-                    product_links.add(full_url)
-                        
-            logger.info(f"Found {len(product_links)} product links from comprehensive A-Z list")
-            
+            response = self._get(list_page_url, timeout=15, stream=True)
+            try:
+                response.raise_for_status()
+                parser, seen = self._new_link_parser(), set()
+                for chunk in self._stored_body(list_page_url, response, response.iter_content(LISTING_CHUNK_SIZE)):
+                    parser.feed(chunk)
+                    for product_url in self._parsed_links(parser, seen):
+                        found += 1
+                        yield product_url
+                parser.close()
+                for product_url in self._parsed_links(parser, seen):
+                    found += 1
+                    yield product_url
+            finally:
+                response.close()
+            logger.info(f"Found {found} product links from comprehensive A-Z list")
+
         except Exception as e:
+            self.discovery_error = str(e)
             logger.error(f"Error fetching comprehensive product list: {str(e)}")
-                
-        return list(product_links)
+
+    def extract_product_links(self, content):
+        """Return the absolute product URLs linked from a listing page, in document order without repeats"""
+        parser, seen = self._new_link_parser(), set()
+        parser.feed(content)
+        parser.close()
+        return list(self._parsed_links(parser, seen))
+
+    def _new_link_parser(self):
+        """Incremental HTML parser reporting each <a> element as soon as its start tag is read"""
+        return etree.HTMLPullParser(events=('start',), tag='a')
+
+    def _parsed_links(self, parser, seen: set) -> Iterator[str]:
+        """Product URLs of the <a> elements ``parser`` has read since the last call"""
+        for _, link_elem in parser.read_events():
+            link = link_elem.get('href')
+            if link and self.is_product_url(link):
+                # Normalize URL by removing problematic query parameters
+                normalized_link = link.replace('?lang=default', '')
+                full_url = urljoin(self.base_url, normalized_link)
+                if full_url not in seen:
+                    seen.add(full_url)
+                    yield full_url
     
     def is_product_url(self, url):
         """Check if URL is a product page"""
@@ -217,46 +1990,9 @@ class MakingCosmeticsScraper:
         try:
             # Ensure absolute URL and add proper headers for Demandware API
             absolute_url = urljoin(self.base_url, variation_url)
-            headers = {
-                'Accept': 'application/json, text/html, */*',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Referer': self.base_url
-            }
-            response = self.session.get(absolute_url, timeout=10, headers=headers)
+            response = self._get(absolute_url, timeout=10, headers=self.variation_headers())
             response.raise_for_status()
-            
-            # The response should contain price information - let's parse it
-            if response.text:
-                # Parse JSON response if possible
-                try:
-                    json_data = response.json()
-                    # Handle different response structures
-                    if 'product' in json_data and 'price' in json_data['product']:
-                        price_data = json_data['product']['price']
-                        if 'sales' in price_data and 'formatted' in price_data['sales']:
-                            return price_data['sales']['formatted']
-                except (json.JSONDecodeError, KeyError):
-                    pass
-                    
-                # Fallback to regex patterns
-                price_patterns = [
-                    r'"price"[^}]*"formatted"\s*:\s*"([^"]+)"',
-                    r'"sales"[^}]*"formatted"\s*:\s*"([^"]+)"',
-                    r'\$([\d,]+(?:\.\d{2})?)',
-                    r'"value"\s*:\s*([\d,]+(?:\.\d{2})?)',
-                ]
-                
-                for pattern in price_patterns:
-                    match = re.search(pattern, response.text)
-                    if match:
-                        price_str = match.group(1)
-                        if '$' not in price_str:
-                            try:
-                                price_val = float(price_str.replace(',', ''))
-                                return f'${price_val:.2f}'
-                            except ValueError:
-                                continue
-                        return price_str
+            return self.parse_variation_response(response)
                     
         except requests.exceptions.RequestException as e:
             logger.debug(f"Request error calling variation API {variation_url}: {str(e)}")
@@ -264,24 +2000,57 @@ class MakingCosmeticsScraper:
             logger.debug(f"Unexpected error calling variation API {variation_url}: {str(e)}")
             
         return None
+
+    def variation_headers(self):
+        """Headers the Demandware Product-Variation endpoint expects"""
+        return {
+            'Accept': 'application/json, text/html, */*',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Referer': self.base_url
+        }
+
+    def parse_variation_response(self, response):
+        """Pull the formatted sales price out of a Product-Variation response.
+
+        Works with both requests and httpx responses (``.text`` / ``.json()``).
+        """
+        # The response should contain price information - let's parse it
+        if not response.text:
+            return None
+
+        # Parse JSON response if possible
+        try:
+            json_data = response.json()
+            # Handle different response structures
+            if 'product' in json_data and 'price' in json_data['product']:
+                price_data = json_data['product']['price']
+                if 'sales' in price_data and 'formatted' in price_data['sales']:
+                    return price_data['sales']['formatted']
+        except (json.JSONDecodeError, KeyError):
+            pass
+
+        # Fallback to regex patterns
+        return parse_variation_price(response.text)
     
-    def extract_variants_from_options(self, tree):
-        """Extract size-price variants from select options with dynamic API calls"""
+    def extract_variants_from_options(self, page):
+        """Extract size-price variants from select options.
+
+        Options backed by the Product-Variation API carry a ``variation_url``
+        and their fallback price; resolve_variation_prices() (or its async
+        counterpart) later replaces that price with the dynamic API price.
+        """
         variants = []
         try:
             # Look for select elements with size/variant options (MakingCosmetics specific)
-            options = tree.xpath('//select[contains(@class, "select-Size")]//option | //select[contains(@name, "size")]//option')
-            if not options:
-                options = tree.xpath('//select[contains(@name, "dwvar_")]//option')
+            options = page.size_options or page.variation_options
             
             base_price = None
             # Try to find base price for delta calculations
-            base_price_elem = tree.xpath('//span[contains(@class, "price")]//text() | //div[contains(@class, "sales")]//text()')
+            base_price_elem = page.base_price_texts
             if base_price_elem:
                 for price_text in base_price_elem:
-                    price_match = re.search(r'\$([\d,]+\.\d{2})', price_text)
-                    if price_match:
-                        base_price = float(price_match.group(1).replace(',', ''))
+                    base_price = price_value(price_text, require_cents=True)
+                    if base_price is not None:
                         break
             
             for option in options:
@@ -290,59 +2059,46 @@ class MakingCosmeticsScraper:
                     continue
                     
                 # Extract size from option text - for MakingCosmetics, keep full text like "1.0floz / 30ml"
-                size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                size_matches = re.findall(size_pattern, option_text, re.IGNORECASE)
-                
                 size = None
-                if size_matches:
+                if has_size(option_text):
                     # For MakingCosmetics, use the full option text as size
-                    size = option_text.strip()
-                elif any(unit in option_text.lower() for unit in ['oz', 'ml', 'g', 'kg', 'lb']):
-                    size = option_text.strip()
+                    size = option_text
+                elif any(unit in option_text.lower() for unit in SIZE_UNIT_HINTS):
+                    size = option_text
                 
                 if size:
                     # Check for MakingCosmetics dynamic pricing
                     option_price = None
                     variation_url = option.get('value')
                     
-                    # Method 1: Call Product-Variation API for dynamic pricing
-                    if variation_url and 'Product-Variation' in variation_url:
-                        # logger.debug(f"Calling variation API for size {size}")
-                        option_price = self.call_product_variation_api(variation_url)
-                        # if option_price:
-                        #     logger.debug(f"Got price {option_price} for size {size} via API")
+                    # Method 1: Product-Variation API for dynamic pricing (resolved later)
+                    is_dynamic = bool(variation_url and 'Product-Variation' in variation_url)
                     
                     # Method 2: Fallback to data attributes  
                     if not option_price:
                         data_price = option.get('data-price')
                         if data_price:
-                            price_match = re.search(r'([\d,]+(?:\.\d{2})?)', data_price)
-                            if price_match:
-                                price_val = float(price_match.group(1).replace(',', ''))
-                                option_price = f'${price_val:.2f}'
+                            option_price = parse_price(data_price, dollar_sign=False)
                     
                     # Method 3: Price delta in option text (+ $X.XX)
                     if not option_price and base_price:
-                        delta_match = re.search(r'\(\+\s*\$([\d,]+\.\d{2})\)', option_text)
-                        if delta_match:
-                            delta = float(delta_match.group(1).replace(',', ''))
-                            option_price = f'${base_price + delta:.2f}'
+                        delta = parse_delta(option_text)
+                        if delta is not None:
+                            option_price = format_price(base_price + delta)
                         elif '(' not in option_text:  # No delta means base price
-                            option_price = f'${base_price:.2f}'
+                            option_price = format_price(base_price)
                     
                     # Method 4: Direct price in option text (broader patterns)
                     if not option_price:
-                        price_match = re.search(r'\$([\d,]+(?:\.\d{2})?)', option_text)
-                        if price_match:
-                            price_str = price_match.group(1).replace(',', '')
-                            price_val = float(price_str) if '.' in price_str else float(price_str + '.00')
-                            option_price = f'${price_val:.2f}'
+                        option_price = parse_price(option_text)
                     
                     variant = {
                         'size': size,
                         'price': option_price,
-                        'source': 'dynamic_api' if (variation_url and 'Product-Variation' in variation_url) else 'option_data'
+                        'source': 'dynamic_api' if is_dynamic else 'option_data'
                     }
+                    if is_dynamic:
+                        variant['variation_url'] = variation_url
                     variants.append(variant)
                     
         except Exception as e:
@@ -351,33 +2107,27 @@ class MakingCosmeticsScraper:
         # Also check radio inputs and UL/LI option lists
         try:
             # Method 1: Radio inputs with labels
-            radio_options = tree.xpath('//input[@type="radio" and (contains(@name, "size") or contains(@name, "option"))]')
-            for radio in radio_options:
-                # Look for following label
-                label_elem = radio.xpath('./following-sibling::label[1] | ./parent::label')[0] if radio.xpath('./following-sibling::label[1] | ./parent::label') else None
+            for radio in page.radios:
+                # Enclosing label first (document order), else the following one
+                parent = radio.getparent()
+                if parent is not None and parent.tag == 'label':
+                    label_elem = parent
+                else:
+                    label_elem = next(radio.itersiblings('label'), None)
                 if label_elem is not None:
                     label_text = (label_elem.text_content() or '').strip()
                     
                     # Extract size
-                    size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                    size_matches = re.findall(size_pattern, label_text, re.IGNORECASE)
-                    size = re.sub(r'\s+', ' ', size_matches[0].strip()) if size_matches else None
+                    size = parse_size(label_text)
                     
                     # Extract price
                     price = None
                     data_price = radio.get('data-price') or radio.get('data-price-diff') or radio.get('data-calcprice')
                     if data_price:
-                        price_match = re.search(r'([\d,]+(?:\.\d{2})?)', data_price)
-                        if price_match:
-                            price_val = float(price_match.group(1).replace(',', ''))
-                            price = f'${price_val:.2f}'
+                        price = parse_price(data_price, dollar_sign=False)
                     
                     if not price:
-                        price_match = re.search(r'\$([\d,]+(?:\.\d{2})?)', label_text)
-                        if price_match:
-                            price_str = price_match.group(1).replace(',', '')
-                            price_val = float(price_str) if '.' in price_str else float(price_str + '.00')
-                            price = f'${price_val:.2f}'
+                        price = parse_price(label_text)
                     
                     if size:
                         variant = {
@@ -388,32 +2138,15 @@ class MakingCosmeticsScraper:
                         variants.append(variant)
             
             # Method 2: UL/LI option lists
-            option_lists = tree.xpath('//ul[contains(@class, "option") or contains(@class, "size")] | //div[contains(@class, "option")]/ul')
-            for ul in option_lists:
-                li_elements = ul.xpath('.//li | .//label')
-                for li in li_elements:
+            for ul in page.option_lists:
+                for li in ul.iter('li', 'label'):
                     li_text = (li.text_content() or '').strip()
                     
                     # Extract size
-                    size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                    size_matches = re.findall(size_pattern, li_text, re.IGNORECASE)
-                    size = re.sub(r'\s+', ' ', size_matches[0].strip()) if size_matches else None
-                    
-                    # Extract price
-                    price = None
-                    price_match = re.search(r'\$([\d,]+(?:\.\d{2})?)', li_text)
-                    if price_match:
-                        price_str = price_match.group(1).replace(',', '')
-                        price_val = float(price_str) if '.' in price_str else float(price_str + '.00')
-                        price = f'${price_val:.2f}'
+                    size = parse_size(li_text)
                     
-                    # Also check for bracketed prices like [+$2.50]
-                    if not price:
-                        bracket_match = re.search(r'\[\+?\$([\d,]+(?:\.\d{2})?)\]', li_text)
-                        if bracket_match:
-                            price_str = bracket_match.group(1).replace(',', '')
-                            price_val = float(price_str) if '.' in price_str else float(price_str + '.00')
-                            price = f'${price_val:.2f}'
+                    # Extract price (also covers bracketed prices like [+$2.50])
+                    price = parse_price(li_text)
                     
                     if size:
                         variant = {
@@ -428,12 +2161,11 @@ class MakingCosmeticsScraper:
             
         return variants
     
-    def extract_variants_from_json_ld(self, tree):
+    def extract_variants_from_json_ld(self, page):
         """Extract variants from JSON-LD structured data"""
         variants = []
         try:
-            json_scripts = tree.xpath('//script[@type="application/ld+json"]//text()')
-            for script_content in json_scripts:
+            for script_content in page.json_ld_texts:
                 try:
                     json_data = json.loads(script_content)
                     # Handle both single objects and arrays
@@ -450,17 +2182,15 @@ class MakingCosmeticsScraper:
                                 size = None
                                 for field in ['description', 'name', 'sku']:
                                     if field in offer:
-                                        size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                                        size_matches = re.findall(size_pattern, offer[field], re.IGNORECASE)
-                                        if size_matches:
-                                            size = re.sub(r'\s+', ' ', size_matches[0].strip())
+                                        size = parse_size(offer[field])
+                                        if size:
                                             break
                                 
                                 price = offer.get('price')
                                 if size and price:
                                     variant = {
                                         'size': size,
-                                        'price': f'${float(price):.2f}',
+                                        'price': format_price(float(price)),
                                         'source': 'json_ld'
                                     }
                                     variants.append(variant)
@@ -472,102 +2202,80 @@ class MakingCosmeticsScraper:
             
         return variants
     
-    def extract_variants_from_inline_json(self, response_text):
-        """Extract variants from inline JavaScript JSON data"""
+    def extract_variants_from_inline_json(self, page):
+        """Extract variants from inline JavaScript JSON data in <script> bodies"""
         variants = []
         try:
             # Look for common patterns of inline product data
-            patterns = [
-                r'var\s+product\s*=\s*(\{.+?\});',
-                r'window\.product\s*=\s*(\{.+?\});',
-                r'"variants"\s*:\s*(\[.+?\])',
-                r'"options"\s*:\s*(\[.+?\])'  
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, response_text, re.DOTALL | re.IGNORECASE)
-                for match in matches:
-                    try:
-                        json_data = json.loads(match)
-                        
-                        # Handle variants array
-                        if isinstance(json_data, list):
-                            variants_data = json_data
-                        elif 'variants' in json_data:
-                            variants_data = json_data['variants']
-                        elif 'options' in json_data:
-                            variants_data = json_data['options']
-                        else:
-                            continue
-                            
-                        for variant_data in variants_data:
-                            size = None
-                            price = None
-                            
-                            # Extract size from various fields
-                            for field in ['title', 'name', 'option1', 'option2', 'size']:
-                                if field in variant_data:
-                                    size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                                    size_matches = re.findall(size_pattern, str(variant_data[field]), re.IGNORECASE)
-                                    if size_matches:
-                                        size = re.sub(r'\s+', ' ', size_matches[0].strip())
-                                        break
-                            
-                            # Extract price
-                            for field in ['price', 'price_min', 'price_max']:
-                                if field in variant_data:
-                                    price_val = variant_data[field]
-                                    if isinstance(price_val, (int, float)):
-                                        price = f'${float(price_val):.2f}'
-                                        break
-                                    elif isinstance(price_val, str):
-                                        price_match = re.search(r'([\d,]+\.\d{2})', price_val)
-                                        if price_match:
-                                            price = f'${float(price_match.group(1).replace(",", "")):.2f}'
-                                            break
-                            
-                            if size and price:
-                                variant = {
-                                    'size': size,
-                                    'price': price,
-                                    'source': 'inline_json'
-                                }
-                                variants.append(variant)
-                                
-                    except json.JSONDecodeError:
-                        continue
+            for json_data in iter_inline_json(page.script_texts):
+                # Handle variants array
+                if isinstance(json_data, list):
+                    variants_data = json_data
+                elif 'variants' in json_data:
+                    variants_data = json_data['variants']
+                elif 'options' in json_data:
+                    variants_data = json_data['options']
+                else:
+                    continue
+                    
+                for variant_data in variants_data:
+                    size = None
+                    price = None
+                    
+                    # Extract size from various fields
+                    for field in ['title', 'name', 'option1', 'option2', 'size']:
+                        if field in variant_data:
+                            size = parse_size(str(variant_data[field]))
+                            if size:
+                                break
+                    
+                    # Extract price
+                    for field in ['price', 'price_min', 'price_max']:
+                        if field in variant_data:
+                            price_val = variant_data[field]
+                            if isinstance(price_val, (int, float)):
+                                price = format_price(float(price_val))
+                                break
+                            elif isinstance(price_val, str):
+                                price = parse_price(price_val, require_cents=True, dollar_sign=False)
+                                if price:
+                                    break
+                    
+                    if size and price:
+                        variant = {
+                            'size': size,
+                            'price': price,
+                            'source': 'inline_json'
+                        }
+                        variants.append(variant)
                         
         except Exception as e:
             logger.debug(f"Error extracting inline JSON variants: {str(e)}")
             
         return variants
     
-    def extract_variants_from_tables(self, tree):
+    def extract_variants_from_tables(self, page):
         """Extract size-price pairs from HTML tables"""
         variants = []
         try:
             # Look for tables with Size and Price headers
-            tables = tree.xpath('//table')
-            for table in tables:
-                headers = table.xpath('.//th//text() | .//td[1]//text()')
+            for table in page.tables:
+                headers = XPATHS['table_header_texts'](table)
                 header_text = ' '.join(headers).lower()
                 
                 if 'size' in header_text and 'price' in header_text:
-                    rows = table.xpath('.//tr[position()>1]')  # Skip header row
+                    rows = XPATHS['table_body_rows'](table)  # Skip header row
                     for row in rows:
-                        cells = row.xpath('.//td//text()')
+                        cells = XPATHS['row_cell_texts'](row)
                         if len(cells) >= 2:
                             size_text = cells[0].strip()
                             price_text = cells[1].strip()
                             
                             # Extract size
-                            size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                            size_matches = re.findall(size_pattern, size_text, re.IGNORECASE)
-                            size = re.sub(r'\s+', ' ', size_matches[0].strip()) if size_matches else None
+                            size = parse_size(size_text)
                             
                             # Extract price
-                            price_match = re.search(r'\$([\d,]+\.\d{2})', price_text)
-                            price = f'${float(price_match.group(1).replace(",", "")):.2f}' if price_match else None
+                            price = parse_price(price_text, require_cents=True)
                             
                             if size and price:
                                 variant = {
@@ -582,200 +2290,654 @@ class MakingCosmeticsScraper:
             
         return variants
     
-    def extract_variants_from_proximity(self, tree):
-        """Extract size-price pairs using DOM proximity as fallback"""
+    def extract_variants_from_proximity(self, page):
+        """Extract size-price pairs using DOM proximity as fallback.
+
+        Walks the document once into a TextNodeIndex, then pairs the first
+        sized text with the nearest price in its neighbourhood, in this
+        order: text nested inside its children, text inside its next three
+        sibling elements, then the first ten texts under its parent.
+        """
         variants = []
         try:
+            index = TextNodeIndex(page)
+
             # Find all size mentions in text
-            all_text_elements = tree.xpath('//*[text()]')
-            
-            for element in all_text_elements:
-                text = element.text or ''
-                size_pattern = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
-                size_matches = re.findall(size_pattern, text, re.IGNORECASE)
-                
-                if size_matches:
-                    size = re.sub(r'\s+', ' ', size_matches[0].strip())
-                    
-                    # Look for price in nearby elements (following siblings, parent, etc.)
-                    price = None
-                    search_elements = (
-                        element.xpath('.//following-sibling::*[position()<=3]//*[text()]') +
-                        element.xpath('.//parent::*//*[text()]')[:10]
-                    )
-                    
-                    for search_elem in search_elements:
-                        search_text = search_elem.text or ''
-                        price_match = re.search(r'\$([\d,]+\.\d{2})', search_text)
-                        if price_match:
-                            price = f'${float(price_match.group(1).replace(",", "")):.2f}'
-                            break
-                    
-                    if size and price:
-                        variant = {
-                            'size': size,
-                            'price': price,
-                            'source': 'proximity'
-                        }
-                        variants.append(variant)
-                        break  # Only take first proximity match to avoid duplicates
+            for i in index.text_positions:
+                size = index.sizes.get(i)
+                if not size:
+                    continue
+                element = index.elements[i]
+
+                # Look for price in nearby elements (following siblings, parent, etc.)
+                nearby = [p for p in index.text_descendants(i) if index.elements[p].getparent() is not element]
+                siblings = [sibling for sibling in element.itersiblings() if isinstance(sibling.tag, str)][:3]
+                for sibling in siblings:
+                    nearby.extend(index.text_descendants(index.position[sibling]))
+                parent = element.getparent()
+                nearby.extend(index.text_descendants(index.position[parent] if parent is not None else i)[:10])
+
+                price = next((index.prices[p] for p in nearby if p in index.prices), None)
+                if price:
+                    variant = {
+                        'size': size,
+                        'price': price,
+                        'source': 'proximity'
+                    }
+                    variants.append(variant)
+                    break  # Only take first proximity match to avoid duplicates
                         
         except Exception as e:
             logger.debug(f"Error extracting proximity variants: {str(e)}")
             
         return variants
     
+    def _variation_pool(self) -> ThreadPoolExecutor:
+        """The executor for Product-Variation calls, started on first use"""
+        with self._variation_executor_lock:
+            if self._variation_executor is None:
+                self._variation_executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers * self.variation_concurrency, thread_name_prefix='variation')
+            return self._variation_executor
+
+    def _close_variation_pool(self) -> None:
+        with self._variation_executor_lock:
+            executor, self._variation_executor = self._variation_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def resolve_variation_prices(self, variants):
+        """Replace fallback prices with Product-Variation API prices where available.
+
+        The calls for one product run concurrently (up to variation_concurrency)
+        and are applied back in option order.
+        """
+        dynamic = [variant for variant in variants if variant.get('variation_url')]
+        if not dynamic:
+            return
+
+        if len(dynamic) == 1 or self.variation_concurrency == 1:
+            prices = [self.call_product_variation_api(variant['variation_url']) for variant in dynamic]
+        else:
+            executor = self._variation_pool()
+            prices, calls = [], deque()
+            for variant in dynamic:
+                if len(calls) >= self.variation_concurrency:
+                    prices.append(calls.popleft().result())
+                # Each call runs in its own copy of this context, so its timings count towards this product
+                context = contextvars.copy_context()
+                calls.append(executor.submit(context.run, self.call_product_variation_api, variant['variation_url']))
+            prices.extend(call.result() for call in calls)
+
+        for variant, option_price in zip(dynamic, prices):
+            if option_price:
+                variant['price'] = option_price
+
+    def parse_product_page(self, content):
+        """Parse a product page into a draft product.
+
+        The draft holds the product name, the variants of the first extractor
+        that found any (Product-Variation prices still pending), the sizes
+        found in free text, used only when no variant had a size, and the
+        seconds spent in each parsing stage that ran.
+        """
+        timings = {}
+        start = time.perf_counter()
+        tree = html.fromstring(content)
+        parsed = time.perf_counter()
+        page = PageFeatures(tree)
+        timings['html'] = parsed - start
+        timings['features'] = time.perf_counter() - parsed
+
+        name = ''
+        for names in page.name_texts:
+            if names:
+                name = ' '.join([n.strip() for n in names if n.strip()])
+                break
+
+        # Enhanced Size and Price Extraction with Multiple Sources
+        all_variants = []
+
+        # Priority 1: Extract variants from select options with data attributes
+        variants_from_options = self._timed(timings, 'options', self.extract_variants_from_options, page)
+        all_variants.extend(variants_from_options)
+
+        # Priority 2: Extract variants from JSON-LD structured data
+        if not all_variants:
+            variants_from_json_ld = self._timed(timings, 'json_ld', self.extract_variants_from_json_ld, page)
+            all_variants.extend(variants_from_json_ld)
+
+        # Priority 3: Extract variants from inline JavaScript JSON
+        if not all_variants:
+            variants_from_inline_json = self._timed(timings, 'inline_json', self.extract_variants_from_inline_json, page)
+            all_variants.extend(variants_from_inline_json)
+
+        # Priority 4: Extract variants from HTML tables
+        if not all_variants:
+            variants_from_tables = self._timed(timings, 'tables', self.extract_variants_from_tables, page)
+            all_variants.extend(variants_from_tables)
+
+        # Priority 5: Extract variants using DOM proximity (fallback)
+        if not all_variants:
+            variants_from_proximity = self._timed(timings, 'proximity', self.extract_variants_from_proximity, page)
+            all_variants.extend(variants_from_proximity)
+
+        # Fallback: Extract sizes from text content if no variants found
+        fallback_sizes = []
+        if not any(variant['size'] for variant in all_variants):
+            fallback_sizes = self._timed(timings, 'text_sizes', lambda: text_sizes(' '.join(page.texts)))
+
+        return {'name': name, 'variants': all_variants, 'text_sizes': fallback_sizes, 'timings': timings}
+
+    def _timed(self, timings, stage, fn, *args):
+        """Call ``fn(*args)``, recording its wall time under ``stage`` in ``timings``"""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = time.perf_counter() - start
+
+    def _observe_parse(self, draft):
+        for stage, seconds in draft['timings'].items():
+            PARSE_SECONDS.labels(stage).observe(seconds)
+            self._record_stage(stage, seconds)
+
+    def parse_page(self, content):
+        """parse_product_page, in the parse pool when there is one"""
+        if self.parse_pool is None:
+            return self.parse_product_page(content)
+        return self.parse_pool.submit(parse_page_in_worker, content).result()
+
+    def assemble_product(self, draft):
+        """Turn a draft from parse_product_page into the product dict"""
+        product = {
+            'name': draft['name'],
+            'sizes': [],
+            'prices': {},
+            'price_info': '',
+            'price_sources': []  # Track which sources provided prices
+        }
+
+        # Process variants into product data
+        sources_used = set()
+        for variant in draft['variants']:
+            if variant['size'] and variant['size'] not in product['sizes']:
+                product['sizes'].append(variant['size'])
+                
+            if variant['price']:
+                product['prices'][variant['size']] = variant['price']
+                sources_used.add(variant['source'])
+        
+        product['price_sources'] = list(sources_used)
+        
+        # Create price_info summary
+        if product['prices']:
+            price_values = list(set(product['prices'].values()))
+            product['price_info'] = ' | '.join(price_values)
+
+        if not product['sizes']:
+            product['sizes'] = list(draft['text_sizes'])
+
+        # sources_info = f" | Sources: {', '.join(product['price_sources'])}" if product['price_sources'] else ""
+        # logger.info(f"Scraped product: {product['name']} | Sizes: {len(product['sizes'])} | Prices: {len(product.get('prices', {}))}{sources_info}")
+        return product
+
+    def _reuse_unchanged(self, product_url, digest):
+        """In incremental mode, return the stored product if the page hash matches"""
+        if self.previous_state is None:
+            return None
+        previous = self.previous_state.get(product_url)
+        if previous and previous.get('hash') == digest and previous.get('product') is not None:
+            self.page_state[product_url] = previous
+            self.page_changes[product_url] = 'unchanged'
+            return previous['product']
+        return None
+
+    def _remember_page(self, product_url, digest, product):
+        if self.previous_state is None:
+            return
+        self.page_state[product_url] = {'hash': digest, 'product': product}
+        self.page_changes[product_url] = 'changed' if product_url in self.previous_state else 'added'
+
+    def _keep_previous_page(self, product_url):
+        """Carry the incremental record of a page not fetched this run over unchanged"""
+        if self.previous_state is not None and product_url in self.previous_state:
+            self.page_state[product_url] = self.previous_state[product_url]
+
+    def _resumed_product(self, product_url):
+        """The product an interrupted run already scraped from ``product_url``, if any"""
+        product = self.resumed.get(product_url)
+        if product is not None:
+            self._keep_previous_page(product_url)
+        return product
+
+    def change_report(self, complete: bool = True):
+        """Summarise what changed since the previous incremental run.
+
+        Args:
+            complete: Whether every listed product was visited; removed
+                products are only reported for complete runs
+        """
+        report = {'added': [], 'changed': [], 'unchanged': 0}
+        for product_url, change in self.page_changes.items():
+            if change == 'unchanged':
+                report['unchanged'] += 1
+            else:
+                report[change].append(product_url)
+        if complete and self.previous_state is not None:
+            report['removed'] = [url for url in self.previous_state if url not in self.page_state]
+        return report
+
     def scrape_product_details(self, product_url):
         """Scrape individual product page for details with enhanced price extraction"""
         try:
-            response = self.session.get(product_url, timeout=15)
+            response = self._get(product_url, timeout=15)
             response.raise_for_status()
-            tree = html.fromstring(response.content)
-            
-            product = {
-                'name': '',
-                'sizes': [],
-                'prices': {},
-                'price_info': '',
-                'price_sources': []  # Track which sources provided prices
-            }
-            
-            # Product name
-            name_selectors = [
-                '//h1[@class="product-name"]//text()',
-                '//h1[contains(@class, "product-title")]//text()',
-                '//div[contains(@class, "product-name")]//text()',
-                '//title//text()'
-            ]
-            
-            for selector in name_selectors:
-                names = tree.xpath(selector)
-                if names:
-                    product['name'] = ' '.join([n.strip() for n in names if n.strip()])
-                    break
-                    
-            # Enhanced Size and Price Extraction with Multiple Sources
-            all_variants = []
-            
-            # Priority 1: Extract variants from select options with data attributes
-            variants_from_options = self.extract_variants_from_options(tree)
-            all_variants.extend(variants_from_options)
-            
-            # Priority 2: Extract variants from JSON-LD structured data
-            if not all_variants:
-                variants_from_json_ld = self.extract_variants_from_json_ld(tree)
-                all_variants.extend(variants_from_json_ld)
-            
-            # Priority 3: Extract variants from inline JavaScript JSON
-            if not all_variants:
-                variants_from_inline_json = self.extract_variants_from_inline_json(response.text)
-                all_variants.extend(variants_from_inline_json)
-            
-            # Priority 4: Extract variants from HTML tables
-            if not all_variants:
-                variants_from_tables = self.extract_variants_from_tables(tree)
-                all_variants.extend(variants_from_tables)
-            
-            # Priority 5: Extract variants using DOM proximity (fallback)
-            if not all_variants:
-                variants_from_proximity = self.extract_variants_from_proximity(tree)
-                all_variants.extend(variants_from_proximity)
-            
-            # Process variants into product data
-            sources_used = set()
-            for variant in all_variants:
-                if variant['size'] and variant['size'] not in product['sizes']:
-                    product['sizes'].append(variant['size'])
-                    
-                if variant['price']:
-                    product['prices'][variant['size']] = variant['price']
-                    sources_used.add(variant['source'])
-            
-            product['price_sources'] = list(sources_used)
-            
-            # Create price_info summary
-            if product['prices']:
-                price_values = list(set(product['prices'].values()))
-                product['price_info'] = ' | '.join(price_values)
-            
-            # Fallback: Extract sizes from text content if no variants found
-            if not product['sizes']:
-                all_text_content = ' '.join(tree.xpath('//text()'))
-                size_patterns = [
-                    r'\b\d+\.?\d*\s*(oz|ounce|ounces)\b',
-                    r'\b\d+\.?\d*\s*(g|gram|grams)\b', 
-                    r'\b\d+\.?\d*\s*(ml|milliliter|milliliters)\b',
-                    r'\b\d+\.?\d*\s*(kg|kilogram|kilograms)\b',
-                    r'\b\d+\.?\d*\s*(lb|pound|pounds)\b',
-                    r'\b\d+\.?\d*\s*(fl\s*oz|fluid\s*ounce)\b'
-                ]
-                
-                for pattern in size_patterns:
-                    for match in re.finditer(pattern, all_text_content, re.IGNORECASE):
-                        size_text = match.group(0)
-                        if size_text and size_text not in product['sizes']:
-                            product['sizes'].append(size_text.strip())
-            
-            sources_info = f" | Sources: {', '.join(product['price_sources'])}" if product['price_sources'] else ""
-            # logger.info(f"Scraped product: {product['name']} | Sizes: {len(product['sizes'])} | Prices: {len(product.get('prices', {}))}{sources_info}")
+            digest = hashlib.sha256(response.content).hexdigest()
+            product = self._reuse_unchanged(product_url, digest)
+            if product is None:
+                draft = self.parse_page(response.content)
+                self._observe_parse(draft)
+                self.resolve_variation_prices(draft['variants'])
+                product = self.assemble_product(draft)
+                self._remember_page(product_url, digest, product)
+            product['url'] = product_url
+            SCRAPED_PRODUCTS.inc()
             return product
             
         except Exception as e:
             logger.error(f"Error scraping product {product_url}: {str(e)}")
+            # A failed fetch says nothing about the page, so it is not reported as removed
+            self._keep_previous_page(product_url)
             return None
             
+    def cancel(self):
+        """Stop scraping pages that have not started yet"""
+        self._cancelled.set()
+
+    def _scrape_product(self, product_url):
+        """Worker body: scrape one product page, logging instead of raising"""
+        if self._cancelled.is_set():
+            return None
+        resumed = self._resumed_product(product_url)
+        if resumed is not None:
+            return resumed
+        try:
+            with ACTIVE_WORKERS.track_inprogress(), self._timing_product():
+                return self.scrape_product_details(product_url)
+        except Exception as e:
+            logger.error(f"Error processing {product_url}: {str(e)}")
+            return None
+
+    def _limit_links(self, product_links: Iterable[str], limit) -> Iterable[str]:
+        # Optional limit for testing
+        if _is_limited(limit):
+            logger.info(f"Limiting to first {limit} product links (testing)")
+            return islice(product_links, limit)
+        return product_links
+
+    def _discover(self, limit, links: queue.Queue, stop: threading.Event):
+        """Discovery producer: stream product URLs into ``links``, then _DISCOVERY_DONE"""
+        def put(item):
+            # Block while the queue is full, but give up once the consumer is gone
+            while not stop.is_set():
+                try:
+                    links.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for product_url in self._limit_links(self._timed_links(self.iter_product_links()), limit):
+                if self._cancelled.is_set() or not put(product_url):
+                    return
+        finally:
+            put(_DISCOVERY_DONE)
+
+    def iter_products(self, limit: int | None = None) -> Iterator[Dict[str, Any]]:
+        """Scrape products concurrently and yield them one by one in link order.
+
+        A discovery thread streams product URLs from the listing into a
+        bounded queue, so product pages start downloading while the listing
+        is still arriving. Only a window of 2 x max_workers pages is in flight
+        or buffered at a time, so memory stays flat however large the catalog
+        is. Closing the generator early cancels the pages not yet started.
+
+        Args:
+            limit: Optional cap on number of product links to process (testing)
+        """
+        window = self.max_workers * 2
+        links = queue.Queue(maxsize=DISCOVERY_QUEUE_SIZE)
+        _discovery_queues.add(links)
+        stop = threading.Event()
+        discovery = threading.Thread(target=self._discover, args=(limit, links, stop),
+                                     name='discover', daemon=True)
+        discovery.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scrape') as executor:
+                pending = deque()
+                try:
+                    while True:
+                        product_url = links.get()
+                        if product_url is _DISCOVERY_DONE:
+                            break
+                        pending.append(executor.submit(self._scrape_product, product_url))
+                        # Hand out finished pages early rather than only when the window is full
+                        while pending and (len(pending) >= window or pending[0].done()):
+                            product = pending.popleft().result()
+                            if product and product.get('name'):
+                                yield product
+                    while pending:
+                        product = pending.popleft().result()
+                        if product and product.get('name'):
+                            yield product
+                finally:
+                    stop.set()
+                    _discovery_queues.discard(links)
+                    for future in pending:
+                        future.cancel()
+        finally:
+            # After the scrape pool has shut down, so no page still needs it
+            self._close_variation_pool()
+
     def scrape_all_products(self, limit: int | None = None):
         """Main method to scrape all products
 
+        Collects iter_products() into self.products; prefer iterating
+        iter_products() directly for large catalogs.
+
         Args:
             limit: Optional cap on number of product links to process (testing)
         """
-        # logger.info("Starting to scrape all products...")
-        
-        # Get all product links
-        product_links = self.get_all_product_links()
-        # logger.info(f"Found {len(product_links)} total product links")
+        self.products.extend(self.iter_products(limit=limit))
+        return self.products
 
-        # Optional limit for testing
-        if limit is not None and isinstance(limit, int) and limit > 0:
-            product_links = product_links[:limit]
-            logger.info(f"Limiting to first {len(product_links)} product links (testing)")
-        
-        # Scrape each product
-        scraped_count = 0
-        for i, product_url in enumerate(product_links):
+
+_page_parser: MakingCosmeticsScraper | None = None
+
+# Queued by the discovery producer after the last product URL
+_DISCOVERY_DONE = object()
+
+
+def parse_page_in_worker(content: bytes) -> Dict[str, Any]:
+    """Parse-pool entry point: parse one product page into a draft.
+
+    The draft (name, variants with pending Product-Variation URLs, free-text
+    sizes) is all that crosses back to the fetching process, which resolves
+    the variation prices and assembles the product.
+    """
+    global _page_parser
+    if _page_parser is None:
+        _page_parser = MakingCosmeticsScraper(max_workers=1)
+    return _page_parser.parse_product_page(content)
+
+
+class AsyncMakingCosmeticsScraper(MakingCosmeticsScraper):
+    """asyncio scraper backend.
+
+    Shares parsing and extraction with MakingCosmeticsScraper but issues every
+    fetch as a coroutine on one pooled httpx.AsyncClient, so in-flight requests
+    cost coroutines rather than threads.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_ASYNC_WORKERS, per_host_concurrency: int | None = None,
+                 rate_limit: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST,
+                 variation_concurrency: int = DEFAULT_VARIATION_CONCURRENCY, shared_limiter: TokenBucket | None = None,
+                 cache: HTTPCache | None = None, previous_state: Dict[str, Dict[str, Any]] | None = None,
+                 parse_pool: ProcessPoolExecutor | None = None,
+                 resumed: Dict[str, Dict[str, Any]] | None = None, base_url: str | None = None):
+        super().__init__(max_workers=max_workers, per_host_concurrency=per_host_concurrency,
+                         rate_limit=rate_limit, burst=burst, variation_concurrency=variation_concurrency,
+                         shared_limiter=shared_limiter, cache=cache, previous_state=previous_state,
+                         parse_pool=parse_pool, resumed=resumed, base_url=base_url)
+
+    def _init_transport(self, session):
+        # Fetches go through one httpx.AsyncClient per run; no requests.Session is needed
+        self.client: httpx.AsyncClient | None = None
+        self._async_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _new_client(self):
+        return httpx.AsyncClient(
+            headers=REQUEST_HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers),
+        )
+
+    async def _aget(self, url, **kwargs):
+        """GET ``url`` through the shared client within the rate limit and per-host budget"""
+        cached = self._prepare_conditional(url, kwargs)
+        waiting = time.perf_counter()
+        await self.limiter.acquire_async()
+        if self.shared_limiter is not None:
+            await self.shared_limiter.acquire_async()
+        host = urlparse(url).netloc
+        slot = self._async_host_slots.get(host)
+        if slot is None:
+            slot = self._async_host_slots[host] = asyncio.Semaphore(self.per_host_concurrency)
+        stream = kwargs.pop('stream', False)
+        kind = self._request_kind(url)
+        async with slot:
+            self._record_stage('politeness', time.perf_counter() - waiting)
+            with self._observe_fetch(kind):
+                if stream:
+                    response = await self.client.send(self.client.build_request('GET', url, **kwargs), stream=True)
+                else:
+                    response = await self.client.get(url, **kwargs)
+        REQUESTS.labels(kind, response.status_code).inc()
+        if not stream:
+            RESPONSE_BYTES.labels(kind).inc(len(response.content))
+
+        if cached is not None and response.status_code == 304:
+            self.cache.touch(url)
+            await response.aclose()
+            cached_response = httpx.Response(200, headers=cached['headers'], content=cached['body'],
+                                             request=response.request)
+            cached_response.from_cache = True
+            return cached_response
+        # A streamed body is stored by its reader once complete
+        if not stream:
+            self._store_in_cache(url, response)
+        return response
+
+    async def get_all_product_links_async(self):
+        """Async counterpart of get_all_product_links"""
+        return [product_url async for product_url in self.aiter_product_links()]
+
+    async def aiter_product_links(self) -> AsyncIterator[str]:
+        """Async counterpart of iter_product_links"""
+        list_page_url = self.listing_url
+        found = 0
+
+        try:
+            response = await self._aget(list_page_url, timeout=15, stream=True)
             try:
-                product = self.scrape_product_details(product_url)
-                if product and product.get('name'):
-                    self.products.append(product)
-                    scraped_count += 1
-                    
-                # Be respectful with requests
-                time.sleep(1)
-                
-                # if (i + 1) % 10 == 0:
-                #     logger.info(f"Scraped {scraped_count} products so far...")
-                    
-            except Exception as e:
-                logger.error(f"Error processing {product_url}: {str(e)}")
-                continue
-                
-        # logger.info(f"Finished scraping! Total products: {len(self.products)}")
-        
-        # Log statistics
-        products_with_sizes = len([p for p in self.products if p.get('sizes')])
-        products_with_prices = len([p for p in self.products if p.get('price_info') or p.get('prices')])
-        # logger.info(f"Products with sizes: {products_with_sizes}/{len(self.products)}")
-        # logger.info(f"Products with prices: {products_with_prices}/{len(self.products)}")
-        
+                response.raise_for_status()
+                parser, seen, body = self._new_link_parser(), set(), []
+                downloaded = RESPONSE_BYTES.labels('listing')
+                async for chunk in response.aiter_bytes(LISTING_CHUNK_SIZE):
+                    body.append(chunk)
+                    if not getattr(response, 'from_cache', False):
+                        downloaded.inc(len(chunk))
+                    parser.feed(chunk)
+                    for product_url in self._parsed_links(parser, seen):
+                        found += 1
+                        yield product_url
+                parser.close()
+                for product_url in self._parsed_links(parser, seen):
+                    found += 1
+                    yield product_url
+                self._store_in_cache(list_page_url, response, b''.join(body))
+            finally:
+                await response.aclose()
+            logger.info(f"Found {found} product links from comprehensive A-Z list")
+
+        except Exception as e:
+            self.discovery_error = str(e)
+            logger.error(f"Error fetching comprehensive product list: {str(e)}")
+
+    async def _atimed_links(self, links: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Async counterpart of _timed_links"""
+        async with aclosing(links):
+            while True:
+                start = time.perf_counter()
+                product_url = await anext(links, _DISCOVERY_DONE)
+                self._record_stage('discovery', time.perf_counter() - start)
+                if product_url is _DISCOVERY_DONE:
+                    return
+                yield product_url
+
+    async def _adiscover(self, limit, links: asyncio.Queue):
+        """Async counterpart of _discover (cancelled by the consumer when it stops early)"""
+        remaining = limit if _is_limited(limit) else None
+        if remaining is not None:
+            logger.info(f"Limiting to first {limit} product links (testing)")
+        async with aclosing(self._atimed_links(self.aiter_product_links())) as product_links:
+            async for product_url in product_links:
+                if self._cancelled.is_set():
+                    break
+                await links.put(product_url)
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+        await links.put(_DISCOVERY_DONE)
+
+    async def call_product_variation_api_async(self, variation_url):
+        """Async counterpart of call_product_variation_api"""
+        try:
+            absolute_url = urljoin(self.base_url, variation_url)
+            response = await self._aget(absolute_url, timeout=10, headers=self.variation_headers())
+            response.raise_for_status()
+            return self.parse_variation_response(response)
+
+        except httpx.HTTPError as e:
+            logger.debug(f"Request error calling variation API {variation_url}: {str(e)}")
+        except Exception as e:
+            logger.debug(f"Unexpected error calling variation API {variation_url}: {str(e)}")
+
+        return None
+
+    async def resolve_variation_prices_async(self, variants):
+        """Async counterpart of resolve_variation_prices"""
+        dynamic = [variant for variant in variants if variant.get('variation_url')]
+        if not dynamic:
+            return
+
+        cap = asyncio.Semaphore(self.variation_concurrency)
+
+        async def fetch(variation_url):
+            async with cap:
+                return await self.call_product_variation_api_async(variation_url)
+
+        prices = await asyncio.gather(*(fetch(variant['variation_url']) for variant in dynamic))
+        for variant, option_price in zip(dynamic, prices):
+            if option_price:
+                variant['price'] = option_price
+
+    async def parse_page_async(self, content):
+        """parse_product_page off the event loop: in the parse pool, else a thread"""
+        if self.parse_pool is None:
+            return await asyncio.to_thread(self.parse_product_page, content)
+        return await asyncio.wrap_future(self.parse_pool.submit(parse_page_in_worker, content))
+
+    async def scrape_product_details_async(self, product_url):
+        """Async counterpart of scrape_product_details; parsing runs in a worker thread"""
+        try:
+            response = await self._aget(product_url, timeout=15)
+            response.raise_for_status()
+            digest = hashlib.sha256(response.content).hexdigest()
+            product = self._reuse_unchanged(product_url, digest)
+            if product is None:
+                draft = await self.parse_page_async(response.content)
+                self._observe_parse(draft)
+                await self.resolve_variation_prices_async(draft['variants'])
+                product = self.assemble_product(draft)
+                self._remember_page(product_url, digest, product)
+            product['url'] = product_url
+            SCRAPED_PRODUCTS.inc()
+            return product
+
+        except Exception as e:
+            logger.error(f"Error scraping product {product_url}: {str(e)}")
+            # A failed fetch says nothing about the page, so it is not reported as removed
+            self._keep_previous_page(product_url)
+            return None
+
+    async def aiter_products(self, limit: int | None = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of iter_products
+
+        Args:
+            limit: Optional cap on number of product links to process (testing)
+        """
+        async with self._new_client() as client:
+            self.client = client
+            window = self.max_workers * 2
+            workers = asyncio.Semaphore(self.max_workers)
+            links = asyncio.Queue(maxsize=DISCOVERY_QUEUE_SIZE)
+            _discovery_queues.add(links)
+            discovery = asyncio.create_task(self._adiscover(limit, links))
+
+            async def scrape_bounded(product_url):
+                async with workers:
+                    if self._cancelled.is_set():
+                        return None
+                    resumed = self._resumed_product(product_url)
+                    if resumed is not None:
+                        return resumed
+                    with ACTIVE_WORKERS.track_inprogress(), self._timing_product():
+                        return await self.scrape_product_details_async(product_url)
+
+            pending = deque()
+            try:
+                while True:
+                    product_url = await links.get()
+                    if product_url is _DISCOVERY_DONE:
+                        break
+                    pending.append(asyncio.create_task(scrape_bounded(product_url)))
+                    while pending and (len(pending) >= window or pending[0].done()):
+                        product = await pending.popleft()
+                        if product and product.get('name'):
+                            yield product
+                while pending:
+                    product = await pending.popleft()
+                    if product and product.get('name'):
+                        yield product
+            finally:
+                discovery.cancel()
+                _discovery_queues.discard(links)
+                for task in pending:
+                    task.cancel()
+                self.client = None
+
+    async def scrape_all_products_async(self, limit: int | None = None):
+        """Async counterpart of scrape_all_products
+
+        Args:
+            limit: Optional cap on number of product links to process (testing)
+        """
+        async for product in self.aiter_products(limit=limit):
+            self.products.append(product)
         return self.products
 
 @app.api_route('/scrape', methods=['GET', 'POST'])
-def scrape_sync(limit: int | None = None):
-    if scraping_status['is_running']:
-        raise HTTPException(status_code=409, detail='Scraping is already in progress')
-    result = run_scrape(limit=limit)
-    return result
+def scrape_sync(limit: int | None = None, workers: int | None = None, backend: str = 'threads',
+                rate_limit: float | None = None, cache: bool = True, incremental: bool = False,
+                resume: str | None = None):
+    """Run a scrape job and return its result once it finishes.
+
+    Takes the same options as /scrape_async. The job shares the
+    SCRAPER_RATE_LIMIT / SCRAPER_RATE_BURST fetch budget; rate_limit can
+    only lower its rate.
+    """
+    _check_backend(backend)
+    job = job_manager.submit(limit=limit, workers=workers, backend=backend, rate_limit=rate_limit,
+                             use_cache=cache, incremental=incremental, resume=_resume_option(resume))
+    job.future.result()
+    if job.result is None:
+        raise HTTPException(status_code=500, detail=job.error)
+    return {**job.full_result(), 'job_id': job.id}
 
 if __name__ == '__main__':
     import uvicorn
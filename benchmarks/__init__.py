@@ -0,0 +1 @@
+"""Offline benchmarks for the MakingCosmetics scraper (run with ``python -m benchmarks.<name>``)"""
@@ -0,0 +1,174 @@
+"""Synthetic storefront catalog in every shape the extractors handle.
+
+Product ``i`` is rendered in ``SHAPES[i % len(SHAPES)]``:
+
+- variation_select: size select whose options call Product-Variation
+- data_price_select: size select with data-price attributes
+- delta_select: base price plus "(+ $X.XX)" deltas in the option text
+- radios: size radios with data-price or a price in the label
+- option_list: UL/LI option list with prices
+- json_ld: JSON-LD Product offers
+- inline_json: ``var product`` / ``window.product`` variants in a <script>
+- table: Size / Price table
+- proximity: a size and a price in neighbouring elements only
+- free_text: sizes in running text, no prices
+
+Pages are generated on demand, so a catalog of any size costs nothing until
+its pages are requested. The storefront stand-in (benchmarks.storefront)
+and the scaling benchmark (benchmarks.scaling) serve it.
+"""
+import json
+import re
+
+LISTING_PATH = '/Ingredients-A-Z_ep_1.html'
+VARIATION_PATH = '/on/demandware.store/Sites-makingcosmetics-Site/en_US/Product-Variation'
+PRODUCT_PATH_RE = re.compile(r'^/ING-(\d+)-01\.html$')
+SHAPES = ('variation_select', 'data_price_select', 'delta_select', 'radios', 'option_list', 'json_ld',
+          'inline_json', 'table', 'proximity', 'free_text')
+SIZE_UNITS = ('oz', 'lb', 'kg', 'ml', 'g')
+
+FILLER = ('<div class="block"><h3>Section {j}</h3><p>Lorem ipsum <a href="/c/{j}">dolor</a> sit amet, '
+          'consectetur adipiscing elit.</p><ul class="nav"><li><a href="/c/{j}/all">Category</a></li></ul></div>')
+HTML = 'text/html; charset=utf-8'
+
+
+def product_path(i):
+    return f'/ING-{i:06d}-01.html'
+
+
+def product_id(i):
+    return f'ING-{i:06d}'
+
+
+def size_text(k):
+    """Size of the k-th variant: "1 oz", "2 lb", "3 kg", ... (unique per k)"""
+    return f'{k + 1} {SIZE_UNITS[k % len(SIZE_UNITS)]}'
+
+
+def size_price(i, k):
+    """Deterministic price of product ``i``'s k-th variant"""
+    return 2.5 + (i % 97) * 0.25 + k * 6.0
+
+
+class Catalog:
+    """``products`` synthetic products with listing, product and Product-Variation responses.
+
+    Args:
+        variants: Variants per product (default: 2 to 5, varying by product)
+        filler: Page-furniture blocks before and after each product body
+        shapes: Page shapes to cycle through (default: all of SHAPES)
+    """
+
+    def __init__(self, products, variants=None, filler=0, shapes=SHAPES):
+        unknown = set(shapes) - set(SHAPES)
+        if unknown:
+            raise ValueError(f"Unknown shapes: {', '.join(sorted(unknown))}")
+        self.products = products
+        self.variants = variants
+        self.filler = filler
+        self.shapes = tuple(shapes)
+        self._furniture = ''.join(FILLER.format(j=j) for j in range(filler))
+        self._listing = None
+
+    def shape(self, i):
+        return self.shapes[i % len(self.shapes)]
+
+    def variant_count(self, i):
+        return self.variants if self.variants is not None else 2 + i % 4
+
+    def listing_page(self):
+        """A-Z listing linking every product, plus the non-product links the real page has"""
+        links = ''.join(f'<li><a href="{product_path(i)}?lang=default">Ingredient {i}</a></li>'
+                        for i in range(self.products))
+        return (f'<html><head><title>Ingredients A-Z</title></head><body>'
+                f'<ul class="nav"><li><a href="/Formulas_ep_2.html">Formulas</a></li>'
+                f'<li><a href="/Service-Contact.html">Contact</a></li></ul><ul class="az-list">{links}</ul></body></html>')
+
+    def product_page(self, i):
+        body = getattr(self, f'_{self.shape(i)}')(i, range(self.variant_count(i)))
+        return (f'<html><head><title>Ingredient {i}</title></head><body>{self._furniture}'
+                f'<h1 class="product-name">Ingredient {i}</h1>{body}'
+                f'<div class="description"><p>Cosmetic ingredient number {i}.</p></div>{self._furniture}</body></html>')
+
+    def variation_response(self, query):
+        """Product-Variation JSON for ``pid`` / ``dwvar_<pid>_size``, or None if unknown"""
+        pid = query.get('pid', [''])[0]
+        match = re.fullmatch(r'ING-(\d+)', pid)
+        size = query.get(f'dwvar_{pid}_size', [''])[0]
+        if match is None or not size.isdigit():
+            return None
+        i, k = int(match.group(1)), int(size)
+        if i >= self.products or k >= self.variant_count(i):
+            return None
+        price = size_price(i, k)
+        return {'product': {'id': pid, 'price': {'sales': {'value': price, 'formatted': f'${price:.2f}'}}}}
+
+    def respond(self, path, query):
+        """(request kind, status, content type, body) for a GET of ``path``"""
+        if path == LISTING_PATH:
+            if self._listing is None:
+                self._listing = self.listing_page().encode()
+            return 'listing', 200, HTML, self._listing
+        match = PRODUCT_PATH_RE.match(path)
+        if match and int(match.group(1)) < self.products:
+            return 'product', 200, HTML, self.product_page(int(match.group(1))).encode()
+        if path == VARIATION_PATH:
+            data = self.variation_response(query)
+            if data is not None:
+                return 'variation', 200, 'application/json', json.dumps(data).encode()
+        return 'other', 404, HTML, b'<html><body>Not found</body></html>'
+
+    # Product bodies, one per shape
+
+    def _variation_select(self, i, ks):
+        pid = product_id(i)
+        options = ''.join(f'<option value="{VARIATION_PATH}?pid={pid}&amp;dwvar_{pid}_size={k}">{size_text(k)}</option>'
+                          for k in ks)
+        return (f'<div class="prices"><span class="price sales">${size_price(i, 0):.2f}</span></div>'
+                f'<select name="dwvar_{pid}_size" class="select-Size"><option>Select Size</option>{options}</select>')
+
+    def _data_price_select(self, i, ks):
+        options = ''.join(f'<option value="{k}" data-price="{size_price(i, k):.2f}">{size_text(k)}</option>' for k in ks)
+        return f'<select name="size" class="select-Size"><option>Select Size</option>{options}</select>'
+
+    def _delta_select(self, i, ks):
+        base = size_price(i, 0)
+        options = ''.join(
+            f'<option value="{k}">{size_text(k)}{f" (+ ${size_price(i, k) - base:.2f})" if k else ""}</option>'
+            for k in ks)
+        return (f'<div class="prices"><span class="price sales">${base:.2f}</span></div>'
+                f'<select name="dwvar_{product_id(i)}_size"><option>Select Size</option>{options}</select>')
+
+    def _radios(self, i, ks):
+        radios = ''.join(
+            f'<input type="radio" name="size" data-price="{size_price(i, k):.2f}"><label>{size_text(k)}</label>'
+            if k % 2 == 0 else
+            f'<label><input type="radio" name="size">{size_text(k)} ${size_price(i, k):.2f}</label>'
+            for k in ks)
+        return f'<div class="sizes">{radios}</div>'
+
+    def _option_list(self, i, ks):
+        items = ''.join(f'<li>{size_text(k)} ${size_price(i, k):.2f}</li>' for k in ks)
+        return f'<div class="product-options"><ul>{items}</ul></div>'
+
+    def _json_ld(self, i, ks):
+        offers = [{'@type': 'Offer', 'name': f'Ingredient {i} {size_text(k)}', 'price': f'{size_price(i, k):.2f}'}
+                  for k in ks]
+        data = {'@context': 'https://schema.org', '@type': 'Product', 'name': f'Ingredient {i}', 'offers': offers}
+        return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+    def _inline_json(self, i, ks):
+        variants = [{'id': k, 'title': size_text(k), 'price': round(size_price(i, k), 2)} for k in ks]
+        if i % 2:
+            return f'<script>window.product = {json.dumps({"id": i, "options": variants})};</script>'
+        return f'<script>var product = {json.dumps({"id": i, "variants": variants})};</script>'
+
+    def _table(self, i, ks):
+        rows = ''.join(f'<tr><td>{size_text(k)}</td><td>${size_price(i, k):.2f}</td></tr>' for k in ks)
+        return f'<table class="pricing"><tr><th>Size</th><th>Price</th></tr>{rows}</table>'
+
+    def _proximity(self, i, ks):
+        return f'<div class="buy"><p>Available in {size_text(0)}</p><p>only <b>${size_price(i, 0):.2f}</b></p></div>'
+
+    def _free_text(self, i, ks):
+        return f'<div class="details"><p>Sold by weight in {", ".join(size_text(k) for k in ks)} bags.</p></div>'
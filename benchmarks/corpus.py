@@ -0,0 +1,148 @@
+"""Record/replay corpus of storefront responses for offline benchmarks.
+
+``record`` runs a normal scrape through a RecordingSession, which saves every
+listing, product and Product-Variation response it fetches to a corpus
+directory; a ReplaySession later answers the same requests from that
+directory, so the scraper runs unchanged without network access.
+
+A corpus is one ``<sha256(url)>.body`` file per response plus
+``manifest.json`` holding, per URL, the status code and the headers the
+scraper looks at (the HTTPCache.KEPT_HEADERS).
+
+    python -m benchmarks.corpus record CORPUS_DIR [--limit N] [--workers W]
+"""
+import argparse
+import hashlib
+import http
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app import DEFAULT_RATE_LIMIT, DEFAULT_WORKERS, HTTPCache, MakingCosmeticsScraper
+
+MANIFEST = 'manifest.json'
+
+
+def body_name(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest() + '.body'
+
+
+def make_response(url, status, headers, body):
+    """An in-memory requests.Response; iter_content (stream=True) reads the body too"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = http.HTTPStatus(status).phrase
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+class ResponderSession(requests.Session):
+    """requests.Session answering every request from ``respond(url)``, without network"""
+
+    def respond(self, url):
+        """(status, headers, body) for a GET of ``url``"""
+        raise NotImplementedError
+
+    def request(self, method, url, *args, **kwargs):
+        return make_response(url, *self.respond(url))
+
+
+class RecordingSession(requests.Session):
+    """requests.Session that saves each GET response to a corpus directory"""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.manifest = {'recorded_at': None, 'limit': None, 'responses': {}}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        if method.upper() == 'GET':
+            # Reading .content buffers a streamed body; iter_content then replays it
+            body = response.content
+            with open(os.path.join(self.directory, body_name(url)), 'wb') as f:
+                f.write(body)
+            headers = {name: response.headers[name] for name in HTTPCache.KEPT_HEADERS if response.headers.get(name)}
+            with self._lock:
+                self.manifest['responses'][url] = {'status': response.status_code, 'headers': headers}
+        return response
+
+    def save(self, limit):
+        """Write the manifest; ``limit`` is the recording's product limit, which a
+        replay reuses to visit the same pages (discovery is in listing order)"""
+        self.manifest['recorded_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.manifest['limit'] = limit
+        with open(os.path.join(self.directory, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+
+
+class ReplaySession(ResponderSession):
+    """requests.Session answering GETs from a recorded corpus (404 for unrecorded URLs)"""
+
+    def __init__(self, directory):
+        super().__init__()
+        with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.bodies = {}
+        for url in self.manifest['responses']:
+            with open(os.path.join(directory, body_name(url)), 'rb') as f:
+                self.bodies[url] = f.read()
+        self._lock = threading.Lock()
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.requests = 0
+        self.misses = 0
+
+    @property
+    def limit(self):
+        return self.manifest['limit']
+
+    def respond(self, url):
+        recorded = self.manifest['responses'].get(url)
+        with self._lock:
+            self.requests += 1
+            self.misses += recorded is None
+        if recorded is None:
+            return 404, {}, b''
+        return recorded['status'], recorded['headers'], self.bodies[url]
+
+
+def record(directory, limit=None, workers=DEFAULT_WORKERS, rate_limit=DEFAULT_RATE_LIMIT):
+    """Scrape the live site through a RecordingSession into ``directory``"""
+    session = RecordingSession(directory)
+    scraper = MakingCosmeticsScraper(max_workers=workers, rate_limit=rate_limit, session=session)
+    products = scraper.scrape_all_products(limit=limit)
+    session.save(limit)
+    return session.manifest, len(products)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help='scrape the live site into a corpus')
+    record_parser.add_argument('directory')
+    record_parser.add_argument('--limit', type=int, default=None, help='product pages to record (default: all)')
+    record_parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    record_parser.add_argument('--rate-limit', type=float, default=DEFAULT_RATE_LIMIT, help='requests/second')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manifest, products = record(args.directory, limit=args.limit, workers=args.workers, rate_limit=args.rate_limit)
+    print(f"recorded {len(manifest['responses'])} responses ({products} products) "
+          f"to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark: inline-JSON scanner vs. the DOTALL regexes it replaced.
+
+Runs both over a typical product page and over a large page full of
+unterminated anchors (the shape that made the lazy ``.+?`` patterns
+backtrack across the whole response), and reports wall time per page.
+
+    python -m benchmarks.inline_json [--blocks N] [--repeat R]
+"""
+import argparse
+import json
+import re
+import time
+
+from lxml import html
+
+from app import PageFeatures
+from text_kernel import iter_inline_json
+
+LEGACY_PATTERNS = [
+    r'var\s+product\s*=\s*(\{.+?\});',
+    r'window\.product\s*=\s*(\{.+?\});',
+    r'"variants"\s*:\s*(\[.+?\])',
+    r'"options"\s*:\s*(\[.+?\])',
+]
+
+VARIANTS = [{'title': f'{size} oz', 'price': size * 1.5} for size in (2, 4, 8, 16, 32)]
+TYPICAL = ('<html><body><h1>Product</h1><p>Description</p>'
+           f'<script>var product = {json.dumps({"variants": VARIANTS})};</script></body></html>')
+
+
+def huge_page(blocks):
+    """``blocks`` text fragments each opening an "options" array that never closes"""
+    filler = ''.join(f'<div class="review">"options": [{i} liked it</div>' for i in range(blocks))
+    return f'<html><body>{filler}<script>var product = {{ sku: 1 }}</script></body></html>'
+
+
+def legacy_scan(text):
+    values = []
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, text, re.DOTALL | re.IGNORECASE):
+            try:
+                values.append(json.loads(match))
+            except json.JSONDecodeError:
+                continue
+    return values
+
+
+def scanner(text):
+    return list(iter_inline_json(PageFeatures(html.fromstring(text)).script_texts))
+
+
+def seconds_per_call(fn, text, repeat):
+    """Best-of-``repeat`` wall seconds for one call"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for label, text in (('typical page', TYPICAL), (f'huge page ({args.blocks} anchors)', huge_page(args.blocks))):
+        legacy = seconds_per_call(legacy_scan, text, args.repeat)
+        scanned = seconds_per_call(scanner, text, args.repeat)
+        print(f"{label:28}: regexes {legacy * 1e3:9.2f} ms, scanner (incl. HTML parse) {scanned * 1e3:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
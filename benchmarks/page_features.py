@@ -0,0 +1,71 @@
+"""Benchmark: single-pass PageFeatures vs. one XPath query per selector.
+
+Builds a corpus of product pages covering every extractor shape from
+benchmarks.catalog (size selects, radios, option lists, JSON-LD, inline JSON,
+tables, proximity-only and free-text-only pages), padded with ordinary page
+furniture, and reports CPU time per page for collecting the extractor
+candidates both ways, plus the full parse_product_page for scale.
+
+    python -m benchmarks.page_features [--pages N] [--filler F] [--repeat R]
+"""
+import argparse
+
+from lxml import html
+
+from app import MakingCosmeticsScraper, PageFeatures
+from benchmarks.catalog import Catalog
+from benchmarks.timing import cpu_per_item
+
+# The per-extractor selectors parse_product_page used to run on every page
+LEGACY_SELECTORS = [
+    '//h1[@class="product-name"]//text()',
+    '//h1[contains(@class, "product-title")]//text()',
+    '//div[contains(@class, "product-name")]//text()',
+    '//title//text()',
+    '//select[contains(@class, "select-Size")]//option | //select[contains(@name, "size")]//option',
+    '//select[contains(@name, "dwvar_")]//option',
+    '//span[contains(@class, "price")]//text() | //div[contains(@class, "sales")]//text()',
+    '//input[@type="radio" and (contains(@name, "size") or contains(@name, "option"))]',
+    '//ul[contains(@class, "option") or contains(@class, "size")] | //div[contains(@class, "option")]/ul',
+    '//script[@type="application/ld+json"]//text()',
+    '//table',
+    '//text()',
+]
+
+
+def build_corpus(pages, filler):
+    """``pages`` product pages cycling through every Catalog shape, each with ``filler`` furniture blocks"""
+    catalog = Catalog(pages, filler=filler)
+    return [catalog.product_page(i).encode() for i in range(pages)]
+
+
+def legacy_features(tree):
+    for selector in LEGACY_SELECTORS:
+        tree.xpath(selector)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=210)
+    parser.add_argument('--filler', type=int, default=40, help='furniture blocks before and after the product')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages, args.filler)
+    trees = [html.fromstring(content) for content in corpus]
+    scraper = MakingCosmeticsScraper()
+
+    parse = cpu_per_item(html.fromstring, corpus, args.repeat)
+    legacy = cpu_per_item(legacy_features, trees, args.repeat)
+    single = cpu_per_item(PageFeatures, trees, args.repeat)
+    full = cpu_per_item(scraper.parse_product_page, corpus, args.repeat)
+    elements = sum(1 for tree in trees for _ in tree.iter()) / len(trees)
+    print(f"corpus            : {len(corpus)} pages, {elements:.0f} nodes/page")
+    print(f"lxml parse        : {parse * 1e6:8.1f} us/page")
+    print(f"per-selector XPath: {legacy * 1e6:8.1f} us/page")
+    print(f"PageFeatures      : {single * 1e6:8.1f} us/page ({legacy / single:.2f}x)")
+    print(f"parse_product_page: {full * 1e6:8.1f} us/page")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: replay a recorded corpus through MakingCosmeticsScraper.
+
+Serves every request from a corpus made by ``python -m benchmarks.corpus
+record`` (no network), so the numbers measure the scraper alone:
+
+- throughput: product pages/sec and requests/sec of a full threaded scrape,
+  best of ``--repeat`` runs
+- per-extractor CPU: PageFeatures and each variant extractor run over every
+  recorded product page
+- peak memory: tracemalloc peak of one scrape (a separate, slower pass)
+
+    python -m benchmarks.replay CORPUS_DIR [--workers W] [--parse-processes P] [--repeat R]
+"""
+import argparse
+import logging
+import multiprocessing
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import html
+
+from app import DEFAULT_WORKERS, MakingCosmeticsScraper, PageFeatures, parse_page_in_worker
+from benchmarks.corpus import ReplaySession
+from text_kernel import text_sizes
+
+EXTRACTORS = ('options', 'json_ld', 'inline_json', 'tables', 'proximity')
+
+
+def replay_scrape(session, workers, parse_pool=None):
+    """One scrape over the corpus: (products, wall seconds)"""
+    scraper = MakingCosmeticsScraper(max_workers=workers, rate_limit=0, parse_pool=parse_pool, session=session)
+    start = time.perf_counter()
+    products = scraper.scrape_all_products(limit=session.limit)
+    return products, time.perf_counter() - start
+
+
+def product_pages(session, products):
+    """Recorded bodies of the product pages a scrape visited"""
+    return [session.bodies[product['url']] for product in products if product['url'] in session.bodies]
+
+
+def extractor_cpu(pages, repeat):
+    """Best-of-``repeat`` CPU seconds per page for each parsing stage"""
+    scraper = MakingCosmeticsScraper()
+    best = {stage: float('inf') for stage in ('lxml parse', 'PageFeatures', *EXTRACTORS, 'text sizes')}
+    for _ in range(repeat):
+        totals = dict.fromkeys(best, 0.0)
+        for content in pages:
+            start = time.process_time()
+            tree = html.fromstring(content)
+            parsed = time.process_time()
+            page = PageFeatures(tree)
+            totals['lxml parse'] += parsed - start
+            totals['PageFeatures'] += time.process_time() - parsed
+            for name in EXTRACTORS:
+                start = time.process_time()
+                getattr(scraper, f'extract_variants_from_{name}')(page)
+                totals[name] += time.process_time() - start
+            start = time.process_time()
+            text_sizes(' '.join(page.texts))
+            totals['text sizes'] += time.process_time() - start
+        best = {stage: min(best[stage], totals[stage]) for stage in best}
+    return {stage: seconds / len(pages) for stage, seconds in best.items()}
+
+
+def peak_memory(session, workers):
+    """tracemalloc peak bytes of one scrape"""
+    tracemalloc.start()
+    try:
+        replay_scrape(session, workers)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help='corpus recorded with benchmarks.corpus')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--parse-processes', type=int, default=0, help='parse pool size (0 parses in threads)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    session = ReplaySession(args.directory)
+    parse_pool = None
+    if args.parse_processes > 0:
+        parse_pool = ProcessPoolExecutor(args.parse_processes, mp_context=multiprocessing.get_context('spawn'))
+        # Start the workers before timing anything
+        list(parse_pool.map(parse_page_in_worker, [b'<html></html>'] * args.parse_processes))
+
+    try:
+        wall = float('inf')
+        for _ in range(args.repeat):
+            session.reset_counts()
+            products, seconds = replay_scrape(session, args.workers, parse_pool)
+            wall = min(wall, seconds)
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+    pages = product_pages(session, products)
+    if not pages:
+        parser.error(f"no product pages replayed from {args.directory}")
+
+    print(f"corpus            : {len(session.manifest['responses'])} responses, {len(pages)} product pages, "
+          f"{sum(map(len, pages)) / len(pages) / 1024:.1f} KiB/page")
+    if session.misses:
+        print(f"unrecorded URLs   : {session.misses} (answered 404)")
+    print(f"scrape            : {wall:8.3f} s, {len(products) / wall:8.1f} pages/s, "
+          f"{session.requests / wall:8.1f} requests/s ({args.workers} workers)")
+    for stage, seconds in extractor_cpu(pages, args.repeat).items():
+        print(f"{stage:18}: {seconds * 1e6:8.1f} us/page CPU")
+    print(f"peak memory       : {peak_memory(session, args.workers) / 2**20:8.2f} MiB (tracemalloc)")
+
+
+if __name__ == '__main__':
+    main()
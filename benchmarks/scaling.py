@@ -0,0 +1,138 @@
+"""Benchmark: time and memory against catalog size.
+
+Scrapes synthetic catalogs (benchmarks.catalog) of each ``--sizes`` size
+through an in-memory session, so no network or server is involved, and
+times each stage separately:
+
+- discovery: streaming the A-Z listing into product URLs (iter_product_links)
+- scrape: fetching, parsing and assembling every product page
+- serialize: the JSON payload of the results and a ResultStore write
+
+then assemble_product alone against ``--variants`` variants per product (the
+sizes dedupe). For each stage it prints seconds, microseconds per item, the
+tracemalloc peak, and the growth exponent against the previous size (about
+1.0 is linear; clearly above 1 is super-linear).
+
+    python -m benchmarks.scaling [--sizes 1000,10000,100000] [--variants 10,100,1000] [--workers W]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import parse_qs, urlparse
+
+from app import DEFAULT_WORKERS, MakingCosmeticsScraper, ResultStore, ResultStoreSink, format_product
+from benchmarks.catalog import Catalog, size_text
+from benchmarks.corpus import ResponderSession
+
+BASE_URL = 'http://catalog.invalid'
+
+
+class CatalogSession(ResponderSession):
+    """requests.Session answering GETs from a Catalog"""
+
+    def __init__(self, catalog):
+        super().__init__()
+        self.catalog = catalog
+
+    def respond(self, url):
+        parsed = urlparse(url)
+        _, status, content_type, body = self.catalog.respond(parsed.path, parse_qs(parsed.query))
+        return status, {'Content-Type': content_type}, body
+
+
+def measure(fn, memory):
+    """(result, wall seconds, tracemalloc peak bytes or None) of ``fn()``"""
+    if memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def serialize(products, directory):
+    """The /scrape response body plus a ResultStore write of ``products``"""
+    body = json.dumps({'products': [format_product(product) for product in products]})
+    store = ResultStore(os.path.join(directory, f'results-{len(products)}.sqlite'))
+    store.start_run('scaling', {})
+    sink = ResultStoreSink(store, 'scaling')
+    for product in products:
+        sink.write(product)
+    sink.close()
+    return len(body)
+
+
+def dedupe_draft(count):
+    """A draft with ``count`` distinct priced variants, each listed twice"""
+    variants = [{'size': size_text(k), 'price': f'${k + 1:.2f}', 'source': 'option_data'} for k in range(count)]
+    return {'name': 'Ingredient', 'variants': variants + variants, 'text_sizes': []}
+
+
+def report(stage, rows):
+    """Print one stage's rows: (n, seconds, peak) with the growth exponent"""
+    previous = None
+    for n, seconds, peak in rows:
+        growth = ''
+        if previous is not None and previous[1] > 0 and n != previous[0]:
+            growth = f"{math.log(seconds / previous[1]) / math.log(n / previous[0]):6.2f}"
+        memory = f"{peak / 2**20:9.1f} MiB" if peak is not None else ''
+        print(f"{stage:10} {n:>8} {seconds:9.3f} s {seconds / n * 1e6:10.1f} us/item {memory} {growth:>8}")
+        previous = (n, seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated catalog sizes')
+    parser.add_argument('--variants', default='10,100,1000', help='comma-separated variants per product')
+    parser.add_argument('--filler', type=int, default=10, help='page-furniture blocks around each product body')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc (faster, no peaks)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    variant_counts = [int(count) for count in args.variants.split(',')]
+    memory = not args.no_memory
+
+    logging.disable(logging.INFO)
+    rows = {'discovery': [], 'scrape': [], 'serialize': []}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            catalog = Catalog(size, filler=args.filler)
+
+            def new_scraper():
+                return MakingCosmeticsScraper(max_workers=args.workers, rate_limit=0,
+                                              session=CatalogSession(catalog), base_url=BASE_URL)
+
+            links, seconds, peak = measure(lambda: list(new_scraper().iter_product_links()), memory)
+            assert len(links) == size, f"discovered {len(links)} of {size} products"
+            rows['discovery'].append((size, seconds, peak))
+            products, seconds, peak = measure(new_scraper().scrape_all_products, memory)
+            rows['scrape'].append((size, seconds, peak))
+            _, seconds, peak = measure(lambda: serialize(products, directory), memory)
+            rows['serialize'].append((size, seconds, peak))
+
+    dedupe = []
+    scraper = MakingCosmeticsScraper()
+    for count in variant_counts:
+        draft = dedupe_draft(count)
+        repeat = max(1, 20000 // count)
+        _, seconds, peak = measure(lambda: [scraper.assemble_product(draft) for _ in range(repeat)], memory)
+        dedupe.append((count, seconds / repeat, peak))
+
+    print(f"{'stage':10} {'items':>8} {'time':>11} {'per item':>18} {'peak' if memory else '':>13} {'growth':>8}")
+    for stage, stage_rows in rows.items():
+        report(stage, stage_rows)
+    report('dedupe', dedupe)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Local stand-in for the Demandware storefront, for offline load tests.
+
+Serves a synthetic benchmarks.catalog.Catalog of ``--products`` products the
+way makingcosmetics.com does: the Ingredients-A-Z_ep_1.html listing, one page
+per product (cycling through every page shape the extractors handle), and the
+Product-Variation JSON. Every response is delayed by a latency drawn from a
+lognormal distribution, and a fraction of requests can be answered with 429
+(with Retry-After), 503, or held past the client timeout.
+
+    python -m benchmarks.storefront [--port 8000] [--products N] [--variants V] [--filler F]
+        [--latency-ms MS] [--latency-sigma S] [--rate-429 P] [--rate-503 P] [--rate-timeout P]
+
+then point the scraper at it with SCRAPER_BASE_URL=http://127.0.0.1:8000
+(or MakingCosmeticsScraper(base_url=...)).
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.catalog import Catalog
+
+
+class Storefront:
+    """Catalog, latency model and fault injection shared by the request handlers"""
+
+    def __init__(self, catalog: Catalog, latency_ms=50.0, latency_sigma=0.5, rate_429=0.0, rate_503=0.0,
+                 rate_timeout=0.0, timeout_sec=30.0, seed=None):
+        self.catalog = catalog
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.rate_timeout = rate_timeout
+        self.timeout_sec = timeout_sec
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = Counter()
+
+    def draw(self):
+        """(latency seconds, injected fault or None) for one request"""
+        with self._lock:
+            latency = self._random.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1.0
+            roll = self._random.random()
+        fault = None
+        for name, rate in (('429', self.rate_429), ('503', self.rate_503), ('timeout', self.rate_timeout)):
+            if roll < rate:
+                fault = name
+                break
+            roll -= rate
+        return latency * self.latency_ms / 1000, fault
+
+    def count(self, kind, status):
+        with self._lock:
+            self.counts[f'{kind} {status}'] += 1
+
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    server: 'StorefrontServer'
+
+    def do_GET(self):
+        storefront = self.server.storefront
+        url = urlparse(self.path)
+        kind, status, content_type, body = storefront.catalog.respond(url.path, parse_qs(url.query))
+        latency, fault = storefront.draw()
+        headers = {}
+        if fault == 'timeout':
+            # Hold the connection past the client's timeout
+            time.sleep(storefront.timeout_sec)
+            status, body = 504, b''
+        else:
+            time.sleep(latency)
+            if fault == '429':
+                status, body, headers = 429, b'Too Many Requests', {'Retry-After': '1'}
+            elif fault == '503':
+                status, body = 503, b'Service Unavailable'
+        storefront.count(kind, fault or status)
+
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (e.g. timed out)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StorefrontServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, storefront: Storefront):
+        super().__init__(address, StorefrontHandler)
+        self.storefront = storefront
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_storefront(storefront: Storefront, host='127.0.0.1', port=0) -> StorefrontServer:
+    """Serve ``storefront`` from a background thread; stop with server.shutdown()"""
+    server = StorefrontServer((host, port), storefront)
+    threading.Thread(target=server.serve_forever, name='storefront', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help='0 picks a free port')
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--variants', type=int, default=None, help='variants per product (default: 2-5)')
+    parser.add_argument('--filler', type=int, default=0, help='page-furniture blocks around each product body')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='lognormal sigma (0: fixed latency)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='fraction answered 429')
+    parser.add_argument('--rate-503', type=float, default=0.0, help='fraction answered 503')
+    parser.add_argument('--rate-timeout', type=float, default=0.0, help='fraction held for --timeout-sec')
+    parser.add_argument('--timeout-sec', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    catalog = Catalog(args.products, variants=args.variants, filler=args.filler)
+    storefront = Storefront(catalog, latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                            rate_429=args.rate_429, rate_503=args.rate_503, rate_timeout=args.rate_timeout,
+                            timeout_sec=args.timeout_sec, seed=args.seed)
+    server = StorefrontServer((args.host, args.port), storefront)
+    print(f"serving {args.products} products on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(dict(sorted(storefront.counts.items())))
+
+
+if __name__ == '__main__':
+    main()
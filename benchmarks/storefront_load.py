@@ -0,0 +1,137 @@
+"""Benchmark: end-to-end scrape against the local storefront stand-in.
+
+Starts ``benchmarks.storefront`` in a child process (so the server does not
+share the scraper's GIL), scrapes it with the chosen backend, and reports
+throughput, request latency percentiles as seen by the scraper, and the
+status codes / errors it got back.
+
+    python -m benchmarks.storefront_load [--backend threads|async] [--workers W]
+        [--rate-limit R] [--products N] [--latency-ms MS] [--rate-429 P] ...
+"""
+import argparse
+import asyncio
+import logging
+import math
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from app import (
+    DEFAULT_ASYNC_WORKERS, DEFAULT_WORKERS, SCRAPER_BACKENDS, AsyncMakingCosmeticsScraper, MakingCosmeticsScraper,
+)
+
+
+class FetchTimings:
+    """Per-request latency and outcome recorded by the timed scrapers"""
+
+    def __init__(self):
+        self.latencies = []
+        self.outcomes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, seconds, outcome):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.outcomes[outcome] += 1
+
+    def percentile(self, q):
+        """Nearest-rank ``q`` quantile (0 < q <= 1) of the latencies"""
+        ordered = sorted(self.latencies)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0
+
+
+class TimedScraper(MakingCosmeticsScraper):
+    """Threaded scraper recording how long each GET takes to return its response"""
+
+    timings: FetchTimings
+
+    def _get(self, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super()._get(url, **kwargs)
+        except Exception as e:
+            self.timings.record(time.perf_counter() - start, type(e).__name__)
+            raise
+        self.timings.record(time.perf_counter() - start, response.status_code)
+        return response
+
+
+class AsyncTimedScraper(AsyncMakingCosmeticsScraper):
+    """asyncio counterpart of TimedScraper"""
+
+    timings: FetchTimings
+
+    async def _aget(self, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await super()._aget(url, **kwargs)
+        except Exception as e:
+            self.timings.record(time.perf_counter() - start, type(e).__name__)
+            raise
+        self.timings.record(time.perf_counter() - start, response.status_code)
+        return response
+
+
+def start_server(args):
+    """Launch the storefront in a child process; returns (process, base_url)"""
+    command = [sys.executable, '-m', 'benchmarks.storefront', '--port', '0', '--products', str(args.products),
+               '--latency-ms', str(args.latency_ms), '--latency-sigma', str(args.latency_sigma),
+               '--rate-429', str(args.rate_429), '--rate-503', str(args.rate_503),
+               '--rate-timeout', str(args.rate_timeout), '--timeout-sec', str(args.timeout_sec), '--seed', '0']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # First line: "serving N products on http://host:port"
+    base_url = process.stdout.readline().split()[-1]
+    return process, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=SCRAPER_BACKENDS, default='threads')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests/second (0: unlimited)')
+    parser.add_argument('--burst', type=int, default=4)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=None, help='products to scrape (default: all)')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-503', type=float, default=0.0)
+    parser.add_argument('--rate-timeout', type=float, default=0.0)
+    parser.add_argument('--timeout-sec', type=float, default=30.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    process, base_url = start_server(args)
+    try:
+        if args.backend == 'async':
+            scraper_cls, workers = AsyncTimedScraper, args.workers or DEFAULT_ASYNC_WORKERS
+        else:
+            scraper_cls, workers = TimedScraper, args.workers or DEFAULT_WORKERS
+        scraper = scraper_cls(max_workers=workers, rate_limit=args.rate_limit, burst=args.burst, base_url=base_url)
+        scraper.timings = timings = FetchTimings()
+
+        start = time.perf_counter()
+        if args.backend == 'async':
+            products = asyncio.run(scraper.scrape_all_products_async(limit=args.limit))
+        else:
+            products = scraper.scrape_all_products(limit=args.limit)
+        wall = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+    expected = min(args.products, args.limit) if args.limit is not None else args.products
+    priced = sum(1 for product in products if product['prices'])
+    print(f"storefront   : {base_url}, {args.products} products, {args.latency_ms:g} ms median latency")
+    print(f"scrape       : {args.backend}, {workers} workers, {wall:8.2f} s, {len(products) / wall:8.1f} products/s, "
+          f"{len(timings.latencies) / wall:8.1f} requests/s")
+    print(f"products     : {len(products)}/{expected} scraped, {priced} with prices")
+    print("latency      : " + ', '.join(f"p{q * 100:g} {timings.percentile(q) * 1e3:.1f} ms"
+                                       for q in (0.5, 0.95, 0.99, 0.999)))
+    print(f"responses    : {dict(sorted(timings.outcomes.items(), key=str))}")
+
+
+if __name__ == '__main__':
+    main()
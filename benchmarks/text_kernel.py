@@ -0,0 +1,100 @@
+"""Micro-benchmark: text_kernel helpers vs. the inline-literal regex style.
+
+Replays the size/price work one product page costs the extractors (option
+texts, radio/UL labels, table cells, JSON fields, proximity candidates)
+through both implementations and reports CPU time per page.
+
+    python -m benchmarks.text_kernel [--pages N] [--repeat R]
+"""
+import argparse
+import re
+
+from benchmarks.timing import cpu_per_item
+from text_kernel import has_size, parse_delta, parse_price, parse_size, price_value
+
+# Text mix seen on one typical product page
+OPTION_TEXTS = ['Select Size', '1.0floz / 30ml', '4 oz (+ $2.00)', '16 oz (+ $12.50)', '1 lb $24', '2.2 lb / 1kg']
+LABEL_TEXTS = ['8 oz $14.99', '32 fl oz [+$3.50]', '1 gallon', '500 ml $1,024.00']
+CELL_TEXTS = ['8 oz', '$14.99', '16 oz', '$22.00', 'n/a', '']
+PROXIMITY_TEXTS = ['Available in 4 oz and 16 oz', 'Description', 'only $12.00', 'Ships in 2 days'] * 10
+BASE_PRICE_TEXTS = ['Price:', '$9.95']
+DATA_PRICES = ['12.50', '1,200.00', '7']
+
+SIZE_PATTERN = r'\b\d+(?:\.\d+)?\s*(?:fl\s*)?(?:oz|g|ml|kg|lb|gram|liter|L)\b'
+
+
+def legacy_page():
+    """One page of size/price parsing with pattern literals, as the extractors used to do"""
+    base_price = None
+    for text in BASE_PRICE_TEXTS:
+        match = re.search(r'\$([\d,]+\.\d{2})', text)
+        if match:
+            base_price = float(match.group(1).replace(',', ''))
+            break
+    for text in OPTION_TEXTS:
+        if re.findall(SIZE_PATTERN, text, re.IGNORECASE):
+            delta_match = re.search(r'\(\+\s*\$([\d,]+\.\d{2})\)', text)
+            if delta_match and base_price:
+                f'${base_price + float(delta_match.group(1).replace(",", "")):.2f}'
+            match = re.search(r'\$([\d,]+(?:\.\d{2})?)', text)
+            if match:
+                price_str = match.group(1).replace(',', '')
+                f'${float(price_str) if "." in price_str else float(price_str + ".00"):.2f}'
+    for text in DATA_PRICES:
+        match = re.search(r'([\d,]+(?:\.\d{2})?)', text)
+        if match:
+            f'${float(match.group(1).replace(",", "")):.2f}'
+    for text in LABEL_TEXTS:
+        size_matches = re.findall(SIZE_PATTERN, text, re.IGNORECASE)
+        re.sub(r'\s+', ' ', size_matches[0].strip()) if size_matches else None
+        match = re.search(r'\$([\d,]+(?:\.\d{2})?)', text)
+        if match:
+            price_str = match.group(1).replace(',', '')
+            f'${float(price_str) if "." in price_str else float(price_str + ".00"):.2f}'
+    for text in CELL_TEXTS + PROXIMITY_TEXTS:
+        size_matches = re.findall(SIZE_PATTERN, text, re.IGNORECASE)
+        re.sub(r'\s+', ' ', size_matches[0].strip()) if size_matches else None
+        match = re.search(r'\$([\d,]+\.\d{2})', text)
+        if match:
+            f'${float(match.group(1).replace(",", "")):.2f}'
+
+
+def kernel_page():
+    """The same page of work through text_kernel"""
+    base_price = None
+    for text in BASE_PRICE_TEXTS:
+        base_price = price_value(text, require_cents=True)
+        if base_price is not None:
+            break
+    for text in OPTION_TEXTS:
+        if has_size(text):
+            delta = parse_delta(text)
+            if delta is not None and base_price:
+                f'${base_price + delta:.2f}'
+            parse_price(text)
+    for text in DATA_PRICES:
+        parse_price(text, dollar_sign=False)
+    for text in LABEL_TEXTS:
+        parse_size(text)
+        parse_price(text)
+    for text in CELL_TEXTS + PROXIMITY_TEXTS:
+        parse_size(text)
+        parse_price(text, require_cents=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = range(args.pages)
+    legacy = cpu_per_item(lambda _: legacy_page(), pages, args.repeat)
+    kernel = cpu_per_item(lambda _: kernel_page(), pages, args.repeat)
+    print(f"inline literals : {legacy * 1e6:8.1f} us/page")
+    print(f"text_kernel     : {kernel * 1e6:8.1f} us/page")
+    print(f"saved           : {(legacy - kernel) * 1e6:8.1f} us/page ({legacy / kernel:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
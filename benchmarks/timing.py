@@ -0,0 +1,13 @@
+"""Timing helpers shared by the micro-benchmarks"""
+import time
+
+
+def cpu_per_item(fn, items, repeat):
+    """Best-of-``repeat`` CPU seconds per item of ``fn(item)`` over ``items``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        for item in items:
+            fn(item)
+        best = min(best, time.process_time() - start)
+    return best / len(items)